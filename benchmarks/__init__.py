@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Formal Benchmarks Package
+=========================
+
+Standalone micro benchmarks, run them with e.g.:
+
+    python -m benchmarks.bench_validation
+
+They do not need a database server, SQL benchmarks use sqlite in memory.
+"""
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the memory allocated per hydrated document when copying the driver's
+documents against adopting them.
+"""
+
+import sys
+import tracemalloc
+
+from bson import ObjectId
+
+import formal
+
+SCHEMA = {
+    "name": "Article",
+    "id": "#Article",
+    "properties": {
+        "title": {"type": "string"},
+        "views": {"type": "integer"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "author": {
+            "type": "object",
+            "properties": {"name": {"type": "string"}, "mail": {"type": "string"}},
+        },
+        "paragraphs": {"type": "array", "items": {"type": "string"}},
+    },
+}
+
+
+def make_documents(count):
+    """Build documents like the driver would hand them out"""
+
+    return [
+        {
+            "_id": ObjectId(),
+            "title": "Article %i" % i,
+            "views": float(i),
+            "tags": ["news", "tech", "python"],
+            "author": {"name": "Someone", "mail": "someone@example.com"},
+            "paragraphs": ["Lorem ipsum dolor sit amet %i" % n for n in range(20)],
+        }
+        for i in range(count)
+    ]
+
+
+def measure(model, count, **kwargs):
+    """Return the bytes allocated per hydrated document"""
+
+    documents = make_documents(count)
+
+    tracemalloc.start()
+    objects = [
+        model(document, from_find=True, validation=False, **kwargs)
+        for document in documents
+    ]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del objects
+    return allocated / count
+
+
+def main(count=10000):
+    """Run the benchmark and print the results"""
+
+    Article = formal.model_factory(SCHEMA)
+
+    print("%i documents" % count)
+    for label, kwargs in (("copied", {}), ("adopted", {"adopt": True})):
+        print("%-8s %10.1f bytes per document" % (label, measure(Article, count, **kwargs)))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
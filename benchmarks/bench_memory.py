@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Hold a large number of model instances and compare memory and attribute
+access latency of the slotted model classes against dict backed instances
+like model_factory used to generate them.
+"""
+
+import sys
+import tracemalloc
+from timeit import timeit
+
+import formal
+from formal.model_base import ModelBase, PropertyDescriptor
+
+SCHEMA = {
+    "name": "Point",
+    "id": "#Point",
+    "properties": {
+        "name": {"type": "string"},
+        "x": {"type": "integer"},
+        "y": {"type": "integer"},
+    },
+}
+
+
+def hold(model, count):
+    """Return the bytes allocated per instance of `model`"""
+
+    documents = [{"name": "p", "x": i, "y": i} for i in range(count)]
+
+    tracemalloc.start()
+    objects = [
+        model(document, from_find=True, validation=False, adopt=True)
+        for document in documents
+    ]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del objects
+    return allocated / count
+
+
+def main(count=1000000, number=1000000):
+    """Run the benchmark and print the results"""
+
+    Point = formal.model_factory(SCHEMA)
+
+    # Same class, but without descriptors and slots
+    namespace = {
+        key: value
+        for key, value in vars(Point).items()
+        if key != "__slots__" and not isinstance(value, PropertyDescriptor)
+    }
+    DictPoint = type("DictPoint", Point.__bases__, namespace)
+
+    def __init__(self, *args, **kwargs):
+        """Store the class attributes in the instance again"""
+
+        self._schema = SCHEMA
+        self._engine = None
+        self._primary = None
+
+        ModelBase.__init__(self, *args, **kwargs)
+
+    DictPoint.__init__ = __init__
+
+    print("%i instances" % count)
+    for label, model in (("dict backed", DictPoint), ("slotted", Point)):
+        print("%-12s %8.1f bytes per instance" % (label, hold(model, count)))
+
+    for label, model in (("__getattr__", DictPoint), ("descriptor", Point)):
+        point = model({"name": "p", "x": 1, "y": 2})
+        seconds = timeit("point.x", globals={"point": point}, number=number)
+        print("%-12s %8.1f ns per access" % (label, seconds / number * 1000000000))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare assigning a single property of a large document with validating a
+deep copy of the whole document, which is what __setattr__ used to do.
+"""
+
+import sys
+import tracemalloc
+from copy import deepcopy
+from timeit import timeit
+
+import formal
+
+SCHEMA = {
+    "name": "Job",
+    "id": "#Job",
+    "properties": {
+        "status": {"type": "string", "enum": ["new", "running", "done"]},
+        "log": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "time": {"type": "number"},
+                    "message": {"type": "string"},
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                },
+            },
+        },
+    },
+    "required": ["status"],
+}
+
+
+def make_document(entries):
+    """Build a document with a large nested array"""
+
+    return {
+        "status": "new",
+        "log": [
+            {"time": float(i), "message": "entry %i" % i, "tags": ["a", "b", "c"]}
+            for i in range(entries)
+        ],
+    }
+
+
+def main(entries=2000, number=50):
+    """Run the benchmark and print timings and allocations"""
+
+    Job = formal.model_factory(SCHEMA)
+    job = Job(make_document(entries))
+
+    def full():
+        validator = deepcopy(job)
+        validator._fields["status"] = "done"
+        validator.validate()
+
+    def scoped():
+        job.status = "done"
+
+    print("Document with %i log entries" % entries)
+
+    for label, function in (("deepcopy+validate", full), ("property scoped", scoped)):
+        seconds = timeit(function, number=number)
+
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            "%-18s %10.1f us per assignment, %10i bytes peak"
+            % (label, seconds / number * 1000000, peak)
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
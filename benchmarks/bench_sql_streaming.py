@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2018-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Iterate over a large SQL table with find() and compare the peak memory
+against fetching all rows at once, like find() used to.
+"""
+
+import sys
+import tracemalloc
+
+import formal
+
+SCHEMA = {
+    "name": "Reading",
+    "sql": True,
+    "id": "#Reading",
+    "properties": {
+        "readingid": {"type": "integer", "primary": True},
+        "sensor": {"type": "string"},
+        "value": {"type": "integer"},
+    },
+}
+
+
+def peak(function):
+    """Return the peak memory allocated while running `function`"""
+
+    tracemalloc.start()
+    function()
+    _, allocated = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return allocated
+
+
+def main(count=200000, batch_size=1000):
+    """Run the benchmark and print the results"""
+
+    formal.connect_sql(":memory:", "sqlite", "", "", "", 0)
+    Reading = formal.model_factory(SCHEMA)
+
+    Reading.bulk_create(
+        Reading({"sensor": "s%i" % (i % 10), "value": i}) for i in range(count)
+    )
+
+    def fetch_all():
+        """Materialize all rows before building the objects"""
+        with Reading._get_engine().connect() as connection:
+            rows = connection.execute(Reading.table().select()).fetchall()
+        for row in rows:
+            Reading(Reading._transform_object(row), from_find=True, adopt=True)
+
+    def stream():
+        """Build the objects while streaming the rows"""
+        for _ in Reading.find({}, batch_size=batch_size):
+            pass
+
+    print("%i rows" % count)
+    for label, function in (("fetchall", fetch_all), ("streaming", stream)):
+        print("%-10s %10.1f KiB peak" % (label, peak(function) / 1024))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare validating with a fresh jsonschema validator against the validators
+model_factory compiles once per model class.
+"""
+
+import sys
+from timeit import timeit
+
+from jsonschema import validate
+
+import formal
+from formal.model_base import DefaultValidatingDraft4Validator
+
+SCHEMA = {
+    "name": "Country",
+    "id": "#Country",
+    "properties": {
+        "name": {"type": "string"},
+        "abbreviation": {"type": "string", "pattern": "^[A-Z]{2}$"},
+        "population": {"type": "integer", "default": 0},
+        "languages": {"type": "array", "items": {"type": "string"}},
+        "capital": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "lat": {"type": "number"},
+                "lon": {"type": "number"},
+            },
+        },
+    },
+    "required": ["name", "abbreviation"],
+    "additionalProperties": False,
+}
+
+DOCUMENT = {
+    "name": "Sweden",
+    "abbreviation": "SE",
+    "population": 10000000,
+    "languages": ["swedish", "finnish", "sami"],
+    "capital": {"name": "Stockholm", "lat": 59.33, "lon": 18.07},
+}
+
+
+def main(number=20000):
+    """Run the benchmark and print the timings"""
+
+    Country = formal.model_factory(SCHEMA)
+
+    def uncached():
+        DefaultValidatingDraft4Validator(SCHEMA).validate(dict(DOCUMENT))
+        validate(DOCUMENT, SCHEMA)
+
+    def cached():
+        Country(DOCUMENT)
+
+    for label, function in (("fresh validators", uncached), ("model class", cached)):
+        seconds = timeit(function, number=number)
+        print(
+            "%-18s %8.2f us per document" % (label, seconds / number * 1000000)
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -33,24 +33,40 @@ been added in accordance to the Apache License 2.0
 """
 
 from .model_mongodb import Model as formalModel
-from .model_sqlalchemy import Model as SQLModel
+from .model_sqlalchemy import Model as SQLModel, models as sql_models, create_all
+from .model_base import (
+    ModelBase,
+    PropertyDescriptor,
+    compile_validators,
+    compile_caster,
+    compile_property_casters,
+)
 from .exceptions import InvalidSchemaException
+from .session import Session
+from .cache import ObjectCache, QueryCache
 
 from copy import deepcopy
+from jsonschema.exceptions import SchemaError
 from .database import connect, connect_sql
 import pymongo
 
 # Export connect so we can do formal.connect()
 connect = connect
 connect_sql = connect_sql
+create_all = create_all
+Session = Session
+ObjectCache = ObjectCache
+QueryCache = QueryCache
 
 # Export some constants from pymongo
 ASCENDING = pymongo.ASCENDING
 DESCENDING = pymongo.DESCENDING
 
 
-def model_factory(schema, base_class=formalModel):
-    """ Construct a model based on `schema` that inherits from `base_class`."""
+def model_factory(schema, base_class=formalModel, ensure_indexes=False):
+    """ Construct a model based on `schema` that inherits from `base_class`.
+    With `ensure_indexes`, the indexes the schema declares are created right
+    away. """
 
     if not schema.get("id"):
         raise InvalidSchemaException("No id field in schema!")
@@ -69,7 +85,8 @@ def model_factory(schema, base_class=formalModel):
 
         from .database import sql_database
 
-        engine = sql_database
+        # Models of other databases look their engine up when they're used
+        engine = sql_database if schema.get("databaseName") is None else None
         primary = None
         for item in schema["properties"]:
             thing = schema["properties"][item].get("primary", False)
@@ -82,20 +99,41 @@ def model_factory(schema, base_class=formalModel):
 
     schema = deepcopy(schema)
 
+    try:
+        validator, default_validator = compile_validators(schema)
+    except SchemaError as e:
+        raise InvalidSchemaException("Invalid schema: %s" % e.message)
+
     class Model(base_class):
         """Factory for the model"""
 
         _schema = schema
         _engine = engine
         _primary = primary
+        _validator = validator
+        _default_validator = default_validator
+        _caster = staticmethod(compile_caster(schema))
+        _property_casters = compile_property_casters(schema)
+        _property_validators = {}
+        id_cache = ObjectCache.from_schema(schema)
+        query_cache = QueryCache.from_schema(schema)
+
+        # The state lives in slots, the dict (only created when it's used)
+        # holds private attributes users set on their objects
+        __slots__ = ("__dict__",)
+
+    if issubclass(base_class, (ModelBase, SQLModel)):
+        # Direct access to the properties, unless they'd shadow our API
+        for name in schema["properties"]:
+            if not name.startswith("_") and not hasattr(base_class, name):
+                setattr(Model, name, PropertyDescriptor(name))
 
-        def __init__(self, *args, **kwargs):
-            self._schema = schema
-            self._engine = engine
-            self._primary = primary
+    Model.__name__ = str(schema["name"])
 
-            base_class.__init__(self, *args, **kwargs)
+    if issubclass(base_class, SQLModel):
+        sql_models.add(Model)
 
-    Model.__name__ = str(schema["name"])
+    if ensure_indexes:
+        Model.ensure_indexes()
 
     return Model
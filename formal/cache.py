@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2018-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Caches for model lookups
+
+Enable the object cache of a model in its schema, with "cache": true or with
+options like "cache": {"size": 1000, "ttl": 60}. find_by_id (and find_one on
+just the _id or primary key) are then answered from the cache, writes through
+the model invalidate it.
+
+The query cache ("queryCache": true or {"size": 100}) keeps the results of
+find() by query, sort, skip, limit and projection. Its keys contain the
+write version of the model's collection, which every write through any model
+of that collection increments, so results cached before a write are never
+used again.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from copy import deepcopy
+
+from bson import json_util
+
+# (database, collection) -> number of writes through our models
+_write_versions = {}
+_write_versions_lock = threading.Lock()
+
+
+def _collection_key(model):
+    return model.database_name(), model.collection_name()
+
+
+def write_version(model):
+    """ Get the write version of the collection (or table) of `model`. """
+
+    return _write_versions.get(_collection_key(model), 0)
+
+
+def bump_write_version(model):
+    """ Count a write to the collection (or table) of `model`, making all
+    query results cached for it stale. """
+
+    key = _collection_key(model)
+    with _write_versions_lock:
+        _write_versions[key] = _write_versions.get(key, 0) + 1
+
+
+class ObjectCache(object):
+    """ Size bounded LRU cache of documents by key, with an optional time to
+    live in seconds. Documents are copied in and out, so nobody can change
+    the cached ones. """
+
+    def __init__(self, size=1024, ttl=None, clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        # Entries dropped because the cache was full or they expired
+        self.evictions = 0
+
+        # key -> (expiry time or None, document)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_schema(cls, schema):
+        """ Build the cache a schema asks for, None if it doesn't. """
+
+        options = schema.get("cache")
+        if not options:
+            return None
+        if options is True:
+            return cls()
+
+        return cls(**options)
+
+    def get(self, key):
+        """ Get a copy of the document cached for `key`, or None. """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            document = entry[1]
+
+        return deepcopy(document)
+
+    def put(self, key, document):
+        """ Cache a copy of `document` for `key`. """
+
+        document = deepcopy(document)
+        expires = None if self.ttl is None else self.clock() + self.ttl
+
+        with self._lock:
+            self._entries[key] = (expires, document)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=None):
+        """ Forget the document of `key`, or all of them. """
+
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """ Get the counters and the number of cached documents. """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DictStore(object):
+    """ In-process store of the query cache, keeping the `size` most recently
+    used results. Any object with get(key) and set(key, value) methods can
+    be used as a store instead. Write versions are counted per process, so a
+    store shared between processes has to expire its entries by itself. """
+
+    def __init__(self, size=256):
+        self.size = size
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Get the value of `key`, or None. """
+
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.move_to_end(key)
+
+        return value
+
+    def set(self, key, value):
+        """ Store `value` for `key`. """
+
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+
+            while len(self._values) > self.size:
+                self._values.popitem(last=False)
+
+
+class QueryCache(object):
+    """ Cache of find() results in a `store` (default: a DictStore). """
+
+    def __init__(self, store=None):
+        self.store = DictStore() if store is None else store
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_schema(cls, schema):
+        """ Build the cache a schema asks for, None if it doesn't. """
+
+        options = schema.get("queryCache")
+        if not options:
+            return None
+        if options is True:
+            return cls()
+
+        return cls(store=DictStore(**options))
+
+    def key(self, model, *parts):
+        """ Get the key of a query of `model` described by `parts`, None if
+        they can't be serialized. Dicts of keyword arguments in `parts` may
+        come in any order, everything else keeps its order: embedded
+        documents with other key orders are not equal in MongoDB. """
+
+        key = [
+            model.database_name(),
+            model.collection_name(),
+            write_version(model),
+            [
+                sorted(part.items()) if isinstance(part, dict) else part
+                for part in parts
+            ],
+        ]
+
+        try:
+            return json_util.dumps(key)
+        except TypeError:
+            return None
+
+    def get(self, key):
+        """ Get a copy of the documents cached for `key`, or None. """
+
+        documents = self.store.get(key)
+        if documents is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return deepcopy(documents)
+
+    def put(self, key, documents):
+        """ Cache a copy of the list of `documents` for `key`. """
+
+        self.store.set(key, deepcopy(documents))
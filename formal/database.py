@@ -56,27 +56,69 @@ databases = {}
 # The first connection we make is the default database
 default_database = None
 
+# SQL engines by name
+sql_engines = {}
+
+# The engine of the last unnamed connect_sql() is the default SQL database
 sql_database = None
 
 
 def connect_sql(
-    database,
+    database=None,
     database_type="postgresql",
     username=None,
     password=None,
     host="localhost",
     port=5432,
+    url=None,
+    name=None,
+    echo=False,
+    **engine_options
 ):
-    """Connect an optional SQL database"""
+    """Connect an optional SQL database, either by its parts or a full
+    SQLAlchemy `url`. Other keyword arguments like pool_size, max_overflow,
+    pool_recycle or pool_pre_ping are passed to create_engine().
+
+    The engine is registered under `name` (default: `database`), models with
+    that "databaseName" use it. Without a `name`, it also becomes the default
+    engine. Returns the engine."""
     global sql_database
 
-    if database_type == "sql_memory":
-        url = "sqlite:///:memory:"
-    else:
-        url = "{}://{}:{}@{}:{}/{}"
-        url = url.format(database_type, username, password, host, port, database)
+    if url is None:
+        if database_type == "sql_memory":
+            url = "sqlite:///:memory:"
+        elif database_type == "sqlite":
+            url = "sqlite:///%s" % database
+        else:
+            url = "{}://{}:{}@{}:{}/{}"
+            url = url.format(database_type, username, password, host, port, database)
+
+    engine = sqlalchemy.create_engine(url, echo=echo, **engine_options)
+
+    if name is None:
+        sql_database = engine
+        name = database
+    elif sql_database is None:
+        sql_database = engine
+
+    if name is not None:
+        sql_engines[name] = engine
 
-    sql_database = sqlalchemy.create_engine(url, echo=True)
+    return engine
+
+
+def get_sql_engine(name=None):
+    """ Get an SQL engine by name, or the default engine. """
+
+    if name is None:
+        if sql_database is None:
+            raise NotConnected("no connection to an SQL database has been made.")
+        return sql_database
+
+    try:
+        return sql_engines[name]
+    except KeyError:
+        raise NotConnected("connect_sql() hasn't been called for '%s'" % name)
 
 
 def connect(database, username=None, password=None, host="localhost", port=27017):
@@ -49,3 +49,26 @@ class ValidationError(Exception):
 class InvalidReloadException(Exception):
     """ Thrown when we attempt to call reload() on a model that is not in the
     database. """
+
+
+class FlushError(Exception):
+    """ Thrown when a session could not write all of its objects. The
+    :class:`BulkResult` is in `result`, its errors name the objects. """
+
+    def __init__(self, result):
+        super(FlushError, self).__init__(
+            "%i object(s) could not be written" % len(result.errors)
+        )
+        self.result = result
+
+
+class NotLoadedError(AttributeError):
+    """ Thrown when reading a field of a partial object that was not loaded,
+    because the find() that built it only fetched some `fields`. """
+
+    def __init__(self, field):
+        super(NotLoadedError, self).__init__(
+            "Field '%s' was not loaded, find it without a fields projection"
+            " or reload() the object" % field
+        )
+        self.field = field
@@ -33,14 +33,19 @@ been added in accordance to the Apache License 2.0
 
 """
 
+from collections import namedtuple
 from datetime import datetime
 
 import re
 from copy import deepcopy
+import bson
 from bson import ObjectId
-from jsonschema import validate, Draft4Validator, validators
-from jsonschema.exceptions import ValidationError
-from bson.errors import InvalidId
+from jsonschema import Draft4Validator, validators
+from jsonschema.exceptions import ValidationError, best_match
+from bson.errors import InvalidDocument, InvalidId
+
+from .cache import bump_write_version
+from .exceptions import NotLoadedError
 
 # from .exceptions import InvalidSchemaException
 
@@ -65,9 +70,14 @@ def extend_with_default(validator_class):
 
         for prop, sub_schema in properties.items():
             # print(property, sub_schema)
-            if isinstance(sub_schema, dict) and "default" in sub_schema:
+            if (
+                isinstance(sub_schema, dict)
+                and "default" in sub_schema
+                and prop not in instance
+            ):
                 # print("Setting default: ", sub_schema['default'])
-                instance.setdefault(prop, sub_schema["default"])
+                # Copied, objects must not share the schema's containers
+                instance[prop] = deepcopy(sub_schema["default"])
 
         for error in validate_properties(validator, properties, instance, schema):
             yield error
@@ -75,22 +85,706 @@ def extend_with_default(validator_class):
     return validators.extend(validator_class, {"properties": set_defaults})
 
 
-DefaultValidatingDraft4Validator = extend_with_default(Draft4Validator)
+def _is_object_id(checker, instance):
+    """Object ids are stored as ObjectId and cast to strings"""
+
+    if isinstance(instance, ObjectId):
+        return True
+    return isinstance(instance, str) and ObjectId.is_valid(instance)
+
+
+def _is_date(checker, instance):
+    return isinstance(instance, datetime)
+
+
+# Types formal adds to JSON schema, and the standard ones they are checked
+# like in schemas
+FORMAL_TYPES = {
+    "object_id": (_is_object_id, "string"),
+    "date": (_is_date, "string"),
+}
+
+# Validator class -> its variant knowing the formal types
+_formal_validators = {}
+
+
+def with_formal_types(validator_class):
+    """Get the (cached) variant of `validator_class` that knows the types
+    in FORMAL_TYPES."""
+
+    result = _formal_validators.get(validator_class)
+    if result is None:
+        checker = validator_class.TYPE_CHECKER.redefine_many(
+            {name: check for name, (check, _) in FORMAL_TYPES.items()}
+        )
+        result = validators.extend(validator_class, type_checker=checker)
+        _formal_validators[validator_class] = result
+
+    return result
+
+
+def _standard_types(schema):
+    """Get a copy of `schema` with the formal types replaced by standard
+    ones, for checking it against the meta schema."""
+
+    if isinstance(schema, list):
+        return [_standard_types(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    result = {}
+    for key, value in schema.items():
+        if key == "type" and isinstance(value, str) and value in FORMAL_TYPES:
+            value = FORMAL_TYPES[value][1]
+        elif key == "type" and isinstance(value, list):
+            types = []
+            for item in value:
+                if item in FORMAL_TYPES:
+                    item = FORMAL_TYPES[item][1]
+                if item not in types:
+                    types.append(item)
+            value = types
+        else:
+            value = _standard_types(value)
+        result[key] = value
+
+    return result
+
+
+DefaultValidatingDraft4Validator = extend_with_default(
+    with_formal_types(Draft4Validator)
+)
+
+
+def compile_validators(schema):
+    """Check `schema` once and build the validators a model class reuses.
+
+    Returns a tuple of the plain validator (picked the same way
+    :func:`jsonschema.validate` does) and the default populating one. Both
+    know formal's "object_id" and "date" types.
+    """
+
+    validator_class = validators.validator_for(schema)
+    validator_class.check_schema(_standard_types(schema))
+    validator_class = with_formal_types(validator_class)
+
+    return validator_class(schema), DefaultValidatingDraft4Validator(schema)
+
+
+def _cast_integer(value):
+    """Cast floats to ints, Javascript does not know about the latter"""
+
+    return int(value) if isinstance(value, float) else value
+
+
+def compile_caster(schema):
+    """ Compile `schema` into a function that casts documents the same way
+    :meth:`ModelBase.cast` does, but only visits the paths that can actually
+    change (integers and object ids).
+
+    Returns None, if nothing in documents of this schema ever needs casting.
+    """
+
+    value_type = schema.get("type", "object")
+
+    if value_type == "object" and schema.get("properties"):
+        casters = []
+        for key, sub_schema in schema["properties"].items():
+            if not isinstance(sub_schema, dict):
+                continue
+            caster = compile_caster(sub_schema)
+            if caster is not None:
+                casters.append((key, caster))
+
+        if len(casters) == 0:
+            return None
+
+        casters = tuple(casters)
+
+        def cast_object(value):
+            """Cast the castable properties of an object"""
+
+            if not isinstance(value, dict):
+                return value
+
+            result = dict(value)
+            for key, caster in casters:
+                if key in result:
+                    result[key] = caster(result[key])
+            return result
+
+        return cast_object
+    elif value_type == "array" and isinstance(schema.get("items"), dict):
+        item_caster = compile_caster(schema["items"])
+
+        if item_caster is None:
+            return None
+
+        def cast_array(value):
+            """Cast all items of an array"""
+
+            if not isinstance(value, list):
+                return value
+
+            return [item_caster(item) for item in value]
+
+        return cast_array
+    elif value_type == "integer":
+        return _cast_integer
+    elif value_type == "object_id":
+        return str
+
+    return None
+
+
+def compile_property_casters(schema):
+    """ Compile casting functions for all top level properties of `schema`
+    that need any casting. """
+
+    result = {}
+
+    for key, sub_schema in schema.get("properties", {}).items():
+        if isinstance(sub_schema, dict):
+            caster = compile_caster(sub_schema)
+            if caster is not None:
+                result[key] = caster
+
+    return result
+
+
+def raise_best_error(validator, fields):
+    """Validate `fields` like :func:`jsonschema.validate` would, but with a
+    precompiled validator"""
+
+    error = best_match(validator.iter_errors(fields))
+    if error is not None:
+        raise error
+
+
+# Top level keywords that tie properties together. Changes to documents of
+# schemas using any of these can only be checked by validating everything.
+DOCUMENT_KEYWORDS = frozenset(
+    (
+        "$ref",
+        "allOf",
+        "anyOf",
+        "const",
+        "dependencies",
+        "dependentRequired",
+        "dependentSchemas",
+        "enum",
+        "if",
+        "maxProperties",
+        "minProperties",
+        "not",
+        "oneOf",
+        "patternProperties",
+        "propertyNames",
+        "unevaluatedProperties",
+    )
+)
+
+
+def property_validator(model, attr):
+    """ Get the (cached) validator for the sub schema of property `attr` of
+    `model`. Returns None, if the whole document has to be validated. """
+
+    cache = model._property_validators
+
+    try:
+        return cache[attr]
+    except KeyError:
+        pass
+
+    schema = model._schema
+
+    if DOCUMENT_KEYWORDS.isdisjoint(schema):
+        result = _sub_validator(model._validator, schema["properties"][attr])
+    else:
+        result = None
+
+    cache[attr] = result
+
+    return result
+
+
+def _sub_validator(validator, sub_schema):
+    """ Get a validator like `validator` for `sub_schema` """
+
+    evolve = getattr(validator, "evolve", None)
+    if evolve is not None:
+        return evolve(schema=sub_schema)
+
+    # Older jsonschema versions
+    return type(validator)(sub_schema, resolver=validator.resolver)
+
+
+def partial_validator(model, loaded):
+    """ Get the (cached) validator of `model` for partial objects with the
+    `loaded` fields: only those of the 'required' properties are required. """
+
+    cache = model.__dict__.get("_partial_validators")
+    if cache is None:
+        cache = model._partial_validators = {}
+
+    validator = cache.get(loaded)
+    if validator is None:
+        schema = dict(model._schema)
+        schema["required"] = [
+            name for name in schema.get("required", ()) if name in loaded
+        ]
+        if len(schema["required"]) == 0:
+            del schema["required"]
+        validator = cache[loaded] = _sub_validator(model._validator, schema)
+
+    return validator
+
+
+def projection(fields):
+    """ Get the names of the top level properties a `fields` projection
+    loads, None for whole objects. Only whole properties can be loaded: part
+    of one could neither be validated nor saved. """
+
+    if fields is None:
+        return None
+
+    for name in fields:
+        if "." in name:
+            raise ValueError(
+                "Projections load whole properties, not parts of them: %s" % name
+            )
+
+    return frozenset(fields)
+
+
+def missing_field(model, attr):
+    """ Get the error for reading field `attr` that `model` does not have. """
+
+    try:
+        loaded = object.__getattribute__(model, "_loaded")
+    except AttributeError:
+        # Not set up yet, e.g. while copying: everything is loaded
+        loaded = None
+
+    if loaded is not None and attr not in loaded:
+        if attr in model._schema["properties"] or attr == "_id":
+            return NotLoadedError(attr)
+
+    return AttributeError("Item has no attribute '%s'" % attr)
+
+
+def check_replace(model):
+    """ Refuse writing a partial object as a whole, it would drop all
+    fields that were not loaded. """
+
+    if model._loaded is not None and not model._persisted:
+        raise ValueError(
+            "Partial objects can only save changes to loaded rows or"
+            " documents, not replace them as a whole"
+        )
+
+
+def validate_property(model, attr, value):
+    """ Check if `value` may be assigned to the property `attr` of `model`.
+
+    Only the property's sub schema and the top level 'required' rule are
+    checked, which rejects the same values a full validation would for
+    documents that were valid before.
+    """
+
+    validator = property_validator(model, attr)
+    fields = model._fields
+
+    try:
+        if validator is None:
+            fields = dict(fields)
+            fields.pop("_id", None)
+            fields[attr] = value
+
+            raise_best_error(model._validator, fields)
+        else:
+            loaded = model._loaded
+            for name in model._schema.get("required", ()):
+                if name == attr or (loaded is not None and name not in loaded):
+                    continue
+                if name not in fields:
+                    raise ValidationError("%r is a required property" % name)
+
+            raise_best_error(validator, value)
+    except ValidationError as e:
+        raise ValidationError(
+            "Error:\n" + str(e) + "\nProperty:\n" + attr
+        )
+
+
+def validate_changes(model, changes):
+    """ Check the changes of a set based update of `model`'s documents and
+    return them as a dict of values to set and a list of fields to remove.
+
+    `changes` is either a dict of new values or an update with "$set" and
+    "$unset" parts. As the documents are not loaded, only the sub schemas of
+    the changed properties and the 'required' rule can be checked.
+    """
+
+    if len(changes) > 0 and all(key.startswith("$") for key in changes):
+        unknown = set(changes) - {"$set", "$unset"}
+        if len(unknown) > 0:
+            raise ValueError("Unsupported update operator(s): %s" % ", ".join(unknown))
+        values = changes.get("$set", {})
+        removed = list(changes.get("$unset", ()))
+    else:
+        values = changes
+        removed = []
+
+    if len(values) == 0 and len(removed) == 0:
+        raise ValueError("No changes given")
+
+    schema = model._schema
+    required = schema.get("required", ())
+
+    for attr in removed:
+        if attr in required:
+            raise ValidationError("'%s' is a required property" % attr)
+
+    for attr, value in values.items():
+        sub_schema = schema
+        for key in attr.split("."):
+            properties = sub_schema.get("properties", {})
+            if key in properties:
+                sub_schema = properties[key]
+            elif not sub_schema.get("additionalProperties", True):
+                raise ValidationError("Additional property '%s' not allowed!" % attr)
+            else:
+                sub_schema = {}
+
+        if "." in attr or attr not in schema.get("properties", {}):
+            validator = _sub_validator(model._validator, sub_schema)
+        else:
+            validator = property_validator(model, attr)
+            if validator is None:
+                validator = _sub_validator(model._validator, sub_schema)
+
+        try:
+            raise_best_error(validator, value)
+        except ValidationError as e:
+            raise ValidationError(
+                "Error:\n" + str(e) + "\nProperty:\n" + attr
+            )
+
+    return values, removed
+
+
+class BulkResult(object):
+    """ Summary of a bulk operation. `errors` holds (object, error) tuples for
+    all objects that could not be validated or written. """
+
+    def __init__(self):
+        self.inserted_count = 0
+        self.matched_count = 0
+        self.modified_count = 0
+        self.upserted_count = 0
+        self.deleted_count = 0
+        self.errors = []
+
+    def add(self, details):
+        """ Add the counts of a raw bulk write result. """
+        self.inserted_count += details.get("nInserted", 0)
+        self.matched_count += details.get("nMatched", 0)
+        self.modified_count += details.get("nModified", 0)
+        self.upserted_count += details.get("nUpserted", 0)
+        self.deleted_count += details.get("nRemoved", 0)
+
+    def __repr__(self):
+        return (
+            "<BulkResult inserted=%i matched=%i modified=%i upserted=%i"
+            " deleted=%i errors=%i>"
+            % (
+                self.inserted_count,
+                self.matched_count,
+                self.modified_count,
+                self.upserted_count,
+                self.deleted_count,
+                len(self.errors),
+            )
+        )
+
+
+# Shared by all objects without changes, saves a set per instance
+CLEAN = frozenset()
+
+# Field values that can be changed in place
+MUTABLE = (list, dict)
+
+
+def fingerprint(value):
+    """ Get something to compare a mutable `value` with later, to see if it
+    was changed in place: its BSON encoding or, if it has none, a copy. """
+
+    try:
+        return bson.encode({"v": value})
+    except (InvalidDocument, TypeError):
+        return deepcopy(value)
+
+
+def watch(model, name, value):
+    """ Remember the state of the mutable `value` of field `name`, which is
+    handed out and might be changed in place. Only the first time. Fields
+    the next save writes anyway are only noted, they are fingerprinted once
+    the object is clean, see :meth:`ChangeTrackingMixin._mark_clean`. """
+
+    watched = model._watched
+    if watched is None:
+        watched = model._watched = {}
+    if name not in watched:
+        if model._persisted and name not in model._dirty:
+            watched[name] = fingerprint(value)
+        else:
+            watched[name] = None
+
+
+def mutated_fields(model):
+    """ Get the names of the handed out fields of `model` that were changed
+    in place. """
 
+    watched = model._watched
+    if not watched:
+        return CLEAN
 
-class ModelBase(object):
+    fields = model._fields
+    return {
+        name
+        for name, before in watched.items()
+        if before is not None
+        and name in fields
+        and fingerprint(fields[name]) != before
+    }
+
+
+def declared_indexes(schema):
+    """ Get the indexes `schema` declares as a list of (keys, options)
+    tuples. `keys` is a list of (field, direction) pairs, `options` holds
+    everything else, like "unique", "name" or "expireAfterSeconds".
+
+    Properties declare single field indexes with "index" (true or a
+    direction like -1, "text" or "hashed") and "unique". The top level
+    "indexes" list holds the others, either as a list of keys or as a dict
+    with "keys" and the options. Keys are field names or [field, direction].
+    """
+
+    result = []
+
+    for name, sub_schema in schema.get("properties", {}).items():
+        if not isinstance(sub_schema, dict):
+            continue
+
+        direction = sub_schema.get("index", False)
+        unique = sub_schema.get("unique", False) is True
+        if direction is False and not unique:
+            continue
+
+        if direction is True or direction is False:
+            direction = 1
+
+        options = {"unique": True} if unique else {}
+        result.append(([(name, direction)], options))
+
+    for index in schema.get("indexes", ()):
+        if isinstance(index, dict):
+            options = dict(index)
+            keys = options.pop("keys")
+        else:
+            keys, options = index, {}
+
+        if isinstance(keys, str):
+            keys = [keys]
+
+        keys = [(key, 1) if isinstance(key, str) else tuple(key) for key in keys]
+        result.append((keys, options))
+
+    return result
+
+
+def row_type(model):
+    """ Get a (cached) namedtuple type with a field per schema property of
+    `model`. Properties that are no valid field names are renamed to their
+    position. """
+
+    result = model.__dict__.get("_row_type")
+
+    if result is None:
+        name = model.__name__ if model.__name__.isidentifier() else "Row"
+        result = namedtuple(name, list(model._schema["properties"]), rename=True)
+        model._row_type = result
+
+    return result
+
+
+def as_tuples(model, documents):
+    """ Turn cast `documents` into namedtuples of `model`'s properties. """
+
+    make = row_type(model)._make
+    names = tuple(model._schema["properties"])
+
+    for document in documents:
+        yield make([document.get(name) for name in names])
+
+
+def as_columns(model, documents):
+    """ Collect cast `documents` into a dict with a list per property. """
+
+    names = tuple(model._schema["properties"])
+    columns = {name: [] for name in names}
+    appenders = [(name, columns[name].append) for name in names]
+
+    for document in documents:
+        for name, append in appenders:
+            append(document.get(name))
+
+    return columns
+
+
+class PropertyDescriptor(object):
+    """ Gives direct attribute access to one schema property of a generated
+    model class. The values still live in the model's field dict. """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        try:
+            value = instance._fields[self.name]
+        except KeyError:
+            raise missing_field(instance, self.name)
+
+        if isinstance(value, MUTABLE):
+            watch(instance, self.name, value)
+        return value
+
+    def __set__(self, instance, value):
+        type(instance).__setattr__(instance, self.name, value)
+
+    def __delete__(self, instance):
+        type(instance).__delattr__(instance, self.name)
+
+
+class ChangeTrackingMixin(object):
+    """ Change tracking and cache invalidation shared by the models of all
+    backends. They keep the tracking state in the `_persisted`, `_dirty` and
+    `_watched` slots. """
+
+    __slots__ = ()
+
+    @property
+    def is_dirty(self):
+        """ True, if the next save() has to write anything. Lists and dicts
+        changed in place are noticed, too. """
+        if not self._persisted or len(self._dirty) > 0:
+            return True
+
+        return len(mutated_fields(self)) > 0
+
+    def changed_fields(self):
+        """ Get the names of the fields the next save() will write. Removed
+        fields are included. """
+        if not self._persisted:
+            return set(self._fields)
+
+        return set(self._dirty) | mutated_fields(self)
+
+    def mark_dirty(self, field):
+        """ Make the next save() write `field`, e.g. after changing a value
+        in it that was not read through the object. """
+        self._mark_dirty(field)
+
+    def _mark_clean(self):
+        """ Forget about all changes, the object is in sync with the DB. The
+        lists and dicts handed out before stay watched, as they can still be
+        changed in place. """
+        self._persisted = True
+        self._dirty = CLEAN
+
+        watched = self._watched
+        if watched:
+            fields = self._fields
+            self._watched = {
+                name: fingerprint(fields[name])
+                for name in watched
+                if isinstance(fields.get(name), MUTABLE)
+            }
+
+    def _sync_dirty(self):
+        """ Mark the fields that were changed in place as dirty. """
+        for name in mutated_fields(self):
+            self._mark_dirty(name)
+
+    def _mark_dirty(self, attr):
+        """ Remember that field `attr` has to be written by the next save(). """
+        if self._dirty is CLEAN:
+            self._dirty = {attr}
+        else:
+            self._dirty.add(attr)
+
+    @classmethod
+    def _invalidate(cls, key=None):
+        """ Forget cached data after a write: the cached document of `key` (or
+        all of them) and, by counting the write, all cached query results. """
+        bump_write_version(cls)
+
+        cache = cls.id_cache
+        if cache is not None:
+            cache.invalidate(key)
+
+
+class ModelBase(ChangeTrackingMixin):
     """ This class serves as a base class for the main model types in
     formal: Model, and TwistedModel. """
 
-    def __init__(self, original_fields=None, from_find=False, validation=True, *args,
-                 **kwargs):
-        """ Creates an instance of the object."""
+    __slots__ = (
+        "_fields",
+        "_from_find",
+        "_persisted",
+        "_dirty",
+        "_pending",
+        "_loaded",
+        "_watched",
+    )
+
+    # Filled once per class by model_factory
+    _validator = None
+    _default_validator = None
+    _caster = None
+    _property_casters = None
+    _property_validators = None
+
+    # Cache of documents by _id and of query results, see formal.cache
+    id_cache = None
+    query_cache = None
+
+    def __init__(self, original_fields=None, from_find=False, validation=True,
+                 adopt=False, loaded=None, *args, **kwargs):
+        """ Creates an instance of the object. With `adopt`, the object takes
+        ownership of `original_fields` instead of copying them - use this for
+        documents nobody else holds a reference to, like driver results.
+
+        Partial objects get the set of `loaded` fields, reading others raises
+        a :class:`NotLoadedError`."""
         if original_fields is None:
             original_fields = {}
 
+        self._loaded = loaded
         self._from_find = from_find
+        # Objects from the database only need to write back what changed
+        self._persisted = from_find
+        self._dirty = CLEAN
+        # Fingerprints of the mutable fields handed out, see watch()
+        self._watched = None
 
-        fields = deepcopy(original_fields)
+        fields = original_fields if adopt else deepcopy(original_fields)
         has_id = False
         if "_id" in fields:
             try:
@@ -99,24 +793,35 @@ class ModelBase(object):
                 if validation:
                     raise ValidationError("Invalid object ID: ", fields["_id"])
             has_id = True
-            del fields["_id"]
+            object_id = fields.pop("_id")
 
         # populate any default fields for objects that haven't come from the DB
         if not from_find and validation:
-            DefaultValidatingDraft4Validator(self._schema).validate(fields)
+            known = set(fields)
+            self._default_validator.validate(fields)
+            if len(fields) > len(known):
+                self._dirty = set(fields) - known
             # for field, details in self._schema["properties"].items():
             #    if "default" in details and not field in fields:
             #        fields[field] = details["default"]
 
-        self._fields = self.cast(fields)
+        caster = self._caster
+        self._fields = fields if caster is None else caster(fields)
         if validation is True:
             self.validate()
         if has_id:
-            self._fields["_id"] = original_fields["_id"]
+            self._fields["_id"] = object_id
 
     def get(self, field, default=None):
         """ Get a field if it exists, otherwise return the default. """
-        return self._fields.get(field, default)
+        if field not in self._fields and self._loaded is not None:
+            if field in self._schema["properties"] and field not in self._loaded:
+                raise NotLoadedError(field)
+
+        value = self._fields.get(field, default)
+        if isinstance(value, MUTABLE) and field in self._fields:
+            watch(self, field, value)
+        return value
 
     @classmethod
     def collection_name(cls):
@@ -139,6 +844,9 @@ class ModelBase(object):
 
     def to_dict(self):
         """ Convert the object to a dict. """
+        for name, value in self._fields.items():
+            if isinstance(value, MUTABLE):
+                watch(self, name, value)
         return self._fields
 
     def validate(self):
@@ -157,7 +865,10 @@ class ModelBase(object):
                 #  off object ids)
                 del fields["_id"]
 
-            validate(fields, self._schema)
+            if self._loaded is None:
+                raise_best_error(self._validator, fields)
+            else:
+                raise_best_error(partial_validator(type(self), self._loaded), fields)
         except ValidationError as e:
             raise ValidationError(
                 "Error:\n" + str(e) + "\nFields:\n" + str(self._fields)
@@ -167,7 +878,9 @@ class ModelBase(object):
         """ Cast the fields from Mongo into our format - necessary to convert
         floats into ints since Javascript doesn't support ints. """
         if schema is None:
-            schema = self._schema
+            # Use the function model_factory compiled for our schema
+            caster = self._caster
+            return fields if caster is None else caster(fields)
 
         value_type = schema.get("type", "object")
 
@@ -199,10 +912,19 @@ class ModelBase(object):
     def __getattr__(self, attr):
         """ Get an attribute from the fields we've selected. Note that if the
         field doesn't exist, this will return None. """
+        if attr.startswith("_") and attr != "_id":
+            # Unset slots and dunder lookups, e.g. by copy
+            raise AttributeError("Item has no attribute '%s'" % attr)
+
         if attr in self._schema["properties"] and attr in self._fields:
-            return self._fields.get(attr)
+            value = self._fields[attr]
+            if isinstance(value, MUTABLE):
+                watch(self, attr, value)
+            return value
+        elif attr == "_id" and "_id" in self._fields:
+            return self._fields["_id"]
         else:
-            raise AttributeError("Item has no attribute '%s'" % attr)
+            raise missing_field(self, attr)
 
             # if attr.startswith('_'):
             #     return super(ModelBase, self).__getattr__(attr)
@@ -245,20 +967,41 @@ class ModelBase(object):
                     self._fields["_id"] = ObjectId(value)
                 except InvalidId:
                     raise ValidationError("Invalid ObjectId")
+                # Another document now, it has to be written as a whole
+                self._persisted = False
+                return value
             return object.__setattr__(self, attr, value)
 
         if attr in self._schema["properties"]:
             # Check the field against our schema
-            validator = deepcopy(self)
-            validator._fields[attr] = value
-            validator.validate()
+            validate_property(self, attr, value)
         elif not self._schema.get("additionalProperties", True):
             # not allowed to add additional properties
             raise ValidationError("Additional property '%s' not allowed!" % attr)
 
+        if self._loaded is not None and attr not in self._loaded:
+            # Known now, saving it sets it
+            self._loaded = self._loaded | {attr}
+
         self._fields[attr] = value
+        self._mark_dirty(attr)
         return value
 
+    def __delattr__(self, attr):
+        """ Remove one of the fields, unless it is required. Exception is on
+        "private" fields - the ones that start with _. """
+        if attr.startswith("_"):
+            return object.__delattr__(self, attr)
+
+        if attr not in self._fields:
+            raise missing_field(self, attr)
+
+        if attr in self._schema.get("required", ()):
+            raise ValidationError("'%s' is a required property" % attr)
+
+        del self._fields[attr]
+        self._mark_dirty(attr)
+
     def update(self, new_fields, update_id=False):
         """Updates an objects fields"""
 
@@ -268,3 +1011,179 @@ class ModelBase(object):
                     self.__setattr__(key, value)
         except Exception as e:
             raise ValidationError("Unknown Validation error: '%s' (%s)" % (e, type(e)))
+
+
+class LazyPropertyDescriptor(PropertyDescriptor):
+    """ Property descriptor of lazy models, which hydrates the property on
+    first access. """
+
+    __slots__ = ()
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        instance._hydrate(self.name)
+
+        try:
+            value = instance._fields[self.name]
+        except KeyError:
+            raise missing_field(instance, self.name)
+
+        if isinstance(value, MUTABLE):
+            watch(instance, self.name, value)
+        return value
+
+
+class LazyModelMixin(object):
+    """ Wraps a raw document from the database and only casts (and validates)
+    its fields when they are first read. Any write turns the object into a
+    full instance of its model. """
+
+    __slots__ = ()
+
+    # Set on the generated lazy classes
+    _model = None
+    _lazy_validation = False
+
+    @classmethod
+    def wrap(cls, document, loaded=None):
+        """ Take ownership of the raw `document` without looking at it. """
+
+        obj = object.__new__(cls)
+        obj._loaded = loaded
+        obj._watched = None
+        obj._fields = document
+        obj._from_find = True
+        obj._persisted = True
+        obj._dirty = CLEAN
+
+        if cls._lazy_validation:
+            obj._pending = set(document).intersection(cls._schema["properties"])
+        else:
+            obj._pending = set(document).intersection(cls._property_casters)
+
+        return obj
+
+    def _hydrate(self, name):
+        """ Cast and validate a single field, if not done yet. """
+
+        pending = self._pending
+        if name not in pending:
+            return
+
+        pending.discard(name)
+
+        fields = self._fields
+        if name not in fields:
+            return
+
+        caster = self._property_casters.get(name)
+        if caster is not None:
+            fields[name] = caster(fields[name])
+
+        if self._lazy_validation:
+            validator = property_validator(self, name)
+            if validator is None:
+                self._promote()
+                return
+
+            try:
+                raise_best_error(validator, fields[name])
+            except ValidationError as e:
+                raise ValidationError("Error:\n" + str(e) + "\nProperty:\n" + name)
+
+    def _promote(self):
+        """ Hydrate everything and become a full model instance. """
+
+        fields = self._fields
+        casters = self._property_casters
+
+        for name in self._pending:
+            caster = casters.get(name)
+            if caster is not None and name in fields:
+                fields[name] = caster(fields[name])
+
+        validation = self._lazy_validation
+
+        self._pending = None
+        self.__class__ = self._model
+
+        if validation:
+            self.validate()
+
+    def get(self, field, default=None):
+        """ Get a field if it exists, otherwise return the default. """
+        self._hydrate(field)
+        return self._model.get(self, field, default)
+
+    def to_dict(self):
+        """ Convert the object to a dict. """
+        self._promote()
+        return self.to_dict()
+
+    def validate(self):
+        """ Validate `schema` against a dict `obj`. """
+        self._promote()
+        return self.validate()
+
+    def update(self, *args, **kwargs):
+        """Updates an objects fields"""
+        self._promote()
+        return self.update(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        """ Saves an object to the database. """
+        self._promote()
+        return self.save(*args, **kwargs)
+
+    def reload(self):
+        """ Reload this object's data from the DB. """
+        self._promote()
+        return self.reload()
+
+    def serializablefields(self):
+        """Return serializable fields of the object"""
+        self._promote()
+        return self.serializablefields()
+
+    def __getattr__(self, attr):
+        """ Hydrate and get fields that have no descriptor. """
+        if not attr.startswith("_") or attr == "_id":
+            self._hydrate(attr)
+        return self._model.__getattr__(self, attr)
+
+    def __setattr__(self, attr, value):
+        """ Private fields are set directly, everything else promotes. """
+        if attr.startswith("_") and attr != "_id":
+            return object.__setattr__(self, attr, value)
+
+        self._promote()
+        return setattr(self, attr, value)
+
+    def __delattr__(self, attr):
+        """ Private fields are removed directly, everything else promotes. """
+        if attr.startswith("_"):
+            return object.__delattr__(self, attr)
+
+        self._promote()
+        return delattr(self, attr)
+
+
+def make_lazy_class(model, validation):
+    """ Build the lazy counterpart of `model`, see :class:`LazyModelMixin`. """
+
+    namespace = {
+        "__slots__": (),
+        "__doc__": model.__doc__,
+        "__module__": model.__module__,
+        "_model": model,
+        "_lazy_validation": validation,
+    }
+
+    for cls in model.__mro__:
+        for name, value in vars(cls).items():
+            if isinstance(value, PropertyDescriptor) and name not in namespace:
+                namespace[name] = LazyPropertyDescriptor(name)
+
+    return type(model.__name__, (LazyModelMixin, model), namespace)
@@ -33,19 +33,104 @@ been added in accordance to the Apache License 2.0
 
 """
 
-from bson import ObjectId
-from pymongo import DESCENDING
-
-from .model_base import ModelBase
+from bson import ObjectId, json_util
+from pymongo import (
+    ASCENDING,
+    DESCENDING,
+    DeleteOne,
+    IndexModel,
+    InsertOne,
+    ReplaceOne,
+    UpdateOne,
+)
+from pymongo.errors import BulkWriteError
+
+from .model_base import (
+    BulkResult,
+    ModelBase,
+    check_replace,
+    declared_indexes,
+    make_lazy_class,
+    projection,
+    as_tuples,
+    as_columns,
+    validate_changes,
+)
 import formal.database
 from .exceptions import InvalidReloadException
+from .session import current_session
+from jsonschema.exceptions import ValidationError
 
 from copy import copy
 
 
+def _keyset_order(sort):
+    """ Get key and direction of a single key sort specification. """
+
+    if sort is None:
+        return "_id", ASCENDING
+    if isinstance(sort, str):
+        return sort, ASCENDING
+    if len(sort) == 2 and isinstance(sort[0], str):
+        return sort[0], sort[1]
+    if len(sort) == 1:
+        return sort[0][0], sort[0][1]
+
+    raise ValueError("Batches can only be sorted by a single key")
+
+
+def _index_differs(existing, document):
+    """ Check if an `existing` index (from index_information) is not the one
+    the document of an IndexModel describes. """
+
+    keys = list(document["key"].items())
+
+    # The server stores text indexes by their weights, not their keys
+    if all(direction != "text" for _, direction in keys):
+        if [tuple(key) for key in existing["key"]] != keys:
+            return True
+
+    for option in ("unique", "sparse"):
+        if bool(existing.get(option)) != bool(document.get(option)):
+            return True
+
+    return existing.get("expireAfterSeconds") != document.get("expireAfterSeconds")
+
+
+def _keyset_after(key, direction, last):
+    """ Get the $or conditions for the documents sorted after the `last`
+    one seen. Null and missing values sort before all others. """
+
+    value = last["value"]
+    operator = "$gt" if direction == ASCENDING else "$lt"
+    result = [{key: value, "_id": {operator: last["_id"]}}]
+
+    if value is not None:
+        result.append({key: {operator: value}})
+        if direction != ASCENDING:
+            result.append({key: None})
+    elif direction == ASCENDING:
+        result.append({key: {"$ne": None}})
+
+    return result
+
+
+def _get_path(document, path):
+    """ Get the value of a dotted `path` in `document`. """
+
+    for key in path.split("."):
+        if not isinstance(document, dict):
+            return None
+        document = document.get(key)
+
+    return document
+
+
 class Model(ModelBase):
     """The Mongodb object model class"""
 
+    __slots__ = ()
+
     def reload(self):
         """ Reload this object's data from the DB. """
         result = self.__class__.find_by_id(self._id)
@@ -55,16 +140,39 @@ class Model(ModelBase):
         # fetched
         if result:
             self._fields = self.cast(result._fields)
+            self._loaded = None
+            self._mark_clean()
         else:
             raise InvalidReloadException(
                 "No object in the database with ID %s" % self._id
             )
 
     def save(self, *args, **kwargs):
-        """ Saves an object to the database. """
+        """ Saves an object to the database. Objects that have been loaded
+        from or saved to the database before, only send their changed fields.
+
+        Within a :class:`formal.Session`, the object is written when the
+        session ends. Partial objects can only send their changes.
+        """
         self.validate()
+        check_replace(self)
+        self._sync_dirty()
+
+        session = current_session()
+        if session is not None:
+            session.add(self)
+            return
 
-        if '_id' in self._fields:
+        if '_id' in self._fields and self._persisted:
+            if len(self._dirty) == 0:
+                return
+
+            result = self.collection().update_one(
+                {'_id': self._fields['_id']}, self._update_spec(), *args, **kwargs
+            )
+            assert result.acknowledged is True
+            assert result.matched_count == 1
+        elif '_id' in self._fields:
             result = self.collection().replace_one({'_id': self._fields['_id']}, self._fields, *args, **kwargs)
             assert result.acknowledged is True
             assert result.modified_count == 1
@@ -74,10 +182,36 @@ class Model(ModelBase):
             assert result.inserted_id is not None
             self._fields["_id"] = result.inserted_id
 
+        self._invalidate(self._fields["_id"])
+        self._mark_clean()
+
+    def _update_spec(self):
+        """ Get the $set/$unset update for the changed fields. """
+        update = {}
+        changed = {key: self._fields[key] for key in self._dirty if key in self._fields}
+        removed = {key: "" for key in self._dirty if key not in self._fields}
+        if len(changed) > 0:
+            update["$set"] = changed
+        if len(removed) > 0:
+            update["$unset"] = removed
+
+        return update
+
+    def identity(self):
+        """ Get the key of this object in the identity map of sessions. """
+        return self._fields.get("_id")
+
     def delete(self):
-        """ Removes an object from the database. """
+        """ Removes an object from the database. Within a
+        :class:`formal.Session`, when the session ends. """
+        session = current_session()
+        if session is not None:
+            session.delete(self)
+            return
+
         try:
             self.collection().delete_one({"_id": ObjectId(str(self._fields["_id"]))})
+            self._invalidate(self._fields["_id"])
         except Exception as e:
             print("Uh oh: ", e, type(e))
 
@@ -94,10 +228,221 @@ class Model(ModelBase):
         return result
 
     @classmethod
-    def bulk_create(cls, objects, *args, **kwargs):
-        """ Create a number of objects (yay performance). """
-        docs = [obj._fields for obj in objects]
-        return cls.collection().insert(docs)
+    def bulk_create(cls, objects, chunk_size=1000, ordered=False):
+        """ Create a number of objects (yay performance). The objects are
+        validated first and inserted in chunks of `chunk_size`. Their
+        generated _ids are stored in them. Returns a :class:`BulkResult`. """
+        result = BulkResult()
+        operations = []
+
+        for obj in cls._bulk_validate(objects, result):
+            if "_id" not in obj._fields:
+                obj._fields["_id"] = ObjectId()
+                operations.append((obj, InsertOne(obj._fields), True))
+            else:
+                operations.append((obj, InsertOne(obj._fields), False))
+
+        return cls._bulk_write(operations, chunk_size, ordered, result)
+
+    @classmethod
+    def bulk_save(cls, objects, chunk_size=1000, ordered=False):
+        """ Save a number of objects like save() would, but with as few round
+        trips as possible: New objects are inserted, changed ones send their
+        changed fields and unchanged ones are skipped. Returns a
+        :class:`BulkResult`. """
+        result = BulkResult()
+        valid = cls._bulk_validate(objects, result)
+        operations = [
+            operation
+            for operation in map(cls._save_operation, valid)
+            if operation is not None
+        ]
+
+        return cls._bulk_write(operations, chunk_size, ordered, result)
+
+    @staticmethod
+    def _save_operation(obj):
+        """ Get the (object, operation, assigned_id) tuple to save `obj` like
+        save() would, None if there is nothing to write. """
+        obj._sync_dirty()
+        fields = obj._fields
+
+        if "_id" not in fields:
+            fields["_id"] = ObjectId()
+            return obj, InsertOne(fields), True
+
+        if obj._persisted:
+            if len(obj._dirty) > 0:
+                update = UpdateOne({"_id": fields["_id"]}, obj._update_spec())
+                return obj, update, False
+            return None
+
+        return obj, ReplaceOne({"_id": fields["_id"]}, fields, upsert=True), False
+
+    @classmethod
+    def _session_group(cls):
+        """ Objects of models in the same group are flushed together. """
+        return "mongodb", cls.database_name(), cls.collection_name()
+
+    @classmethod
+    def _flush_session(cls, saved, deleted, session, result):
+        """ Write the objects of a session's flush with a single bulk_write
+        (per chunk_size objects). """
+        valid = cls._bulk_validate(saved, result)
+        operations = [
+            operation
+            for operation in map(cls._save_operation, valid)
+            if operation is not None
+        ]
+        for obj in deleted:
+            operations.append((obj, DeleteOne({"_id": obj._fields["_id"]}), False))
+
+        return cls._bulk_write(operations, session.chunk_size, session.ordered, result)
+
+    @classmethod
+    def bulk_upsert(cls, objects, keys=("_id",), chunk_size=1000, ordered=False):
+        """ Replace the documents matching the objects' `keys` fields by the
+        objects, or insert them if there is none. The objects get the _id of
+        their document. Returns a :class:`BulkResult`. """
+        result = BulkResult()
+        operations = []
+
+        for obj in cls._bulk_validate(objects, result):
+            fields = obj._fields
+            query = {key: fields.get(key) for key in keys}
+
+            if "_id" in keys:
+                document = fields
+            else:
+                # The _id of an existing document can not be replaced
+                document = {
+                    key: value for key, value in fields.items() if key != "_id"
+                }
+
+            operations.append((obj, ReplaceOne(query, document, upsert=True), False))
+
+        cls._bulk_write(operations, chunk_size, ordered, result)
+        if "_id" in keys:
+            return result
+
+        # Look up the _ids of the documents by the keys, only upserted ones
+        # were reported
+        failed = {id(obj) for obj, _ in result.errors}
+        missing = [obj for obj, _, _ in operations if id(obj) not in failed]
+        projection = dict.fromkeys(keys, 1)
+
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            queries = [{key: obj._fields.get(key) for key in keys} for obj in chunk]
+
+            ids = {}
+            for document in cls.collection().find({"$or": queries}, projection):
+                values = json_util.dumps([document.get(key) for key in keys])
+                ids[values] = document["_id"]
+
+            for obj, query in zip(chunk, queries):
+                object_id = ids.get(json_util.dumps([query[key] for key in keys]))
+                if object_id is not None:
+                    obj._fields["_id"] = object_id
+                    obj._mark_clean()
+
+        return result
+
+    @classmethod
+    def delete_many(cls, object_filter):
+        """ Remove all documents matching `object_filter` with a single
+        command. Returns a :class:`BulkResult` with the deleted count. """
+        outcome = cls.collection().delete_many(object_filter)
+        cls._invalidate()
+
+        result = BulkResult()
+        result.deleted_count = outcome.deleted_count
+
+        return result
+
+    @classmethod
+    def update_many(cls, object_filter, changes):
+        """ Change all documents matching `object_filter` with a single
+        command. `changes` is a dict of new values or an update with "$set" and
+        "$unset", which is validated against the changed properties' schemas
+        first. Returns a :class:`BulkResult` with matched and modified counts.
+        """
+        values, removed = validate_changes(cls, changes)
+
+        update = {}
+        if len(values) > 0:
+            update["$set"] = values
+        if len(removed) > 0:
+            update["$unset"] = {key: "" for key in removed}
+
+        outcome = cls.collection().update_many(object_filter, update)
+        cls._invalidate()
+
+        result = BulkResult()
+        result.matched_count = outcome.matched_count
+        result.modified_count = outcome.modified_count
+
+        return result
+
+    @classmethod
+    def _bulk_validate(cls, objects, result):
+        """ Yield all valid objects, collect errors of the others. """
+        for obj in objects:
+            try:
+                obj.validate()
+                check_replace(obj)
+            except (ValidationError, ValueError) as e:
+                result.errors.append((obj, {"errmsg": str(e)}))
+            else:
+                yield obj
+
+    @classmethod
+    def _bulk_write(cls, operations, chunk_size, ordered, result):
+        """ Run (object, operation, assigned_id) tuples in chunks and record
+        the outcome for every object. """
+        collection = cls.collection()
+
+        for start in range(0, len(operations), chunk_size):
+            chunk = operations[start:start + chunk_size]
+
+            try:
+                details = collection.bulk_write(
+                    [operation for _, operation, _ in chunk], ordered=ordered
+                ).bulk_api_result
+            except BulkWriteError as e:
+                details = e.details
+
+            result.add(details)
+
+            failed = {error["index"]: error for error in details.get("writeErrors", ())}
+            upserted = details.get("upserted", ())
+            upserted = {item["index"]: item["_id"] for item in upserted}
+            stopped = ordered and len(failed) > 0
+
+            for index, (obj, _, assigned_id) in enumerate(chunk):
+                if index in failed or (stopped and index > min(failed)):
+                    if assigned_id:
+                        del obj._fields["_id"]
+                    result.errors.append(
+                        (obj, failed.get(index, {"errmsg": "Not written"}))
+                    )
+                    continue
+
+                if index in upserted:
+                    obj._fields["_id"] = upserted[index]
+                # Without an _id, we don't know which document was replaced
+                type(obj)._invalidate(obj._fields.get("_id"))
+                if "_id" in obj._fields:
+                    obj._mark_clean()
+
+            if stopped:
+                for obj, _, assigned_id in operations[start + chunk_size:]:
+                    if assigned_id:
+                        del obj._fields["_id"]
+                    result.errors.append((obj, {"errmsg": "Not written"}))
+                break
+
+        return result
 
     @classmethod
     def find_or_create(cls, query, *args, **kwargs):
@@ -121,65 +466,262 @@ class Model(ModelBase):
         To get a count, use the count() function which accepts the same
         arguments as find() with the exception of non-query fields like sort,
         limit, skip.
+
+        With lazy=True, the objects wrap the raw documents and only cast and
+        validate the fields that are actually read. Changing them turns them
+        into full model instances.
+
+        A batch_size without skip and limit fetches the elements in batches,
+        see find_batches().
+
+        With fields=[...], the server only sends these fields (and the _id)
+        and the objects are partial, see :class:`NotLoadedError`.
         """
         options = {}
         validation = kwargs.get('validation', True)
         if 'validation' in kwargs:
             del kwargs['validation']
 
+        fields = kwargs.pop("fields", None)
+        loaded = projection(fields)
+        if fields is not None:
+            kwargs["projection"] = list(fields)
+
+        session = current_session()
+
+        if kwargs.pop('lazy', False):
+            # Cast and validate fields only when they are used
+            lazy_class = cls.lazy_class(validation)
+
+            def construct(document):
+                """Wrap the document"""
+                return lazy_class.wrap(document, loaded)
+        elif session is not None:
+            def construct(document):
+                """Build a full model instance, unless the session has one"""
+                existing = session.get(cls, document.get("_id"))
+                if existing is not None:
+                    return existing
+                return session.loaded(
+                    cls(
+                        document,
+                        from_find=True,
+                        validation=validation,
+                        adopt=True,
+                        loaded=loaded,
+                    )
+                )
+        else:
+            def construct(document):
+                """Build a full model instance"""
+                return cls(
+                    document,
+                    from_find=True,
+                    validation=validation,
+                    adopt=True,
+                    loaded=loaded,
+                )
+
+        resume_token = kwargs.pop("resume_token", None)
+
         for option in ["sort", "limit", "skip", "batch_size"]:
             if option in kwargs:
                 options[option] = kwargs[option]
-                del options[option]
+                del kwargs[option]
 
         if "batch_size" in options and "skip" not in options and "limit" not in options:
-            # run things in batches
-            current_skip = 0
-            limit = options["batch_size"]
+            if fields is not None:
+                # Batches continue after the last sort key we've seen
+                kwargs["projection"].append(_keyset_order(options.get("sort"))[0])
+
+            # run things in batches, continuing after the last key we've seen
+            batches = cls._keyset_batches(
+                args, kwargs, options["batch_size"], options.get("sort"), resume_token
+            )
 
-            found_something = True
+            for documents, _ in batches:
+                for obj in documents:
+                    yield construct(obj)
+        else:
+            cache = cls.query_cache
+            key = None
+            if cache is not None:
+                # The batch size doesn't change the result
+                parts = {k: v for k, v in options.items() if k != "batch_size"}
+                key = cache.key(cls, args, kwargs, parts)
 
-            while found_something:
-                found_something = False
+            result = None if key is None else cache.get(key)
 
+            if result is None:
                 result = cls.collection().find(*args, **kwargs)
-                result = result.skip(current_skip).limit(limit)
 
                 if "sort" in options:
                     result = result.sort(options["sort"])
 
-                for obj in result:
-                    found_something = True
-                    yield cls(obj, from_find=True, validation=validation)
+                if "skip" in options:
+                    result = result.skip(options["skip"])
+
+                if "limit" in options:
+                    result = result.limit(options["limit"])
+
+                if "batch_size" in options:
+                    result = result.batch_size(options["batch_size"])
+
+                if key is not None:
+                    result = list(result)
+                    cache.put(key, result)
+
+            for obj in result:
+                yield construct(obj)
+
+    @classmethod
+    def find_batches(cls, *args, **kwargs):
+        """ Grabs elements from the DB in batches of `batch_size` (default:
+        1000), paginating by `_id` or a single (indexed) `sort` key instead of
+        skipping.
+
+        Yields tuples of a list of objects and a resume token. Pass the token
+        as `resume_token` to find() or find_batches() to continue the scan
+        after that batch, e.g. after a crash.
+        """
+        validation = kwargs.pop("validation", True)
+        batch_size = kwargs.pop("batch_size", 1000)
+        sort = kwargs.pop("sort", None)
+        resume_token = kwargs.pop("resume_token", None)
 
-                current_skip += limit
+        batches = cls._keyset_batches(args, kwargs, batch_size, sort, resume_token)
+
+        for documents, token in batches:
+            objects = [
+                cls(obj, from_find=True, validation=validation, adopt=True)
+                for obj in documents
+            ]
+            yield objects, token
+
+    @classmethod
+    def _keyset_batches(cls, args, kwargs, batch_size, sort, resume_token):
+        """ Yield batches of raw documents and the token to resume after them.
+        """
+        key, direction = _keyset_order(sort)
+
+        if len(args) > 0:
+            query, args = args[0], args[1:]
+        else:
+            kwargs = dict(kwargs)
+            query = kwargs.pop("filter", None)
+        if query is None:
+            query = {}
+
+        if key == "_id":
+            order = [("_id", direction)]
         else:
-            result = cls.collection().find(*args, **kwargs)
+            order = [(key, direction), ("_id", direction)]
+        operator = "$gt" if direction == ASCENDING else "$lt"
 
-            if "sort" in options:
-                result = result.sort(options["sort"])
+        last = None
+        if resume_token is not None:
+            last = json_util.loads(resume_token)
+            if last["key"] != key or last["direction"] != direction:
+                raise ValueError("Resume token belongs to a different sort order")
 
-            if "skip" in options:
-                result = result.skip(options["skip"])
+        while True:
+            condition = query
 
-            if "limit" in options:
-                result = result.limit(options["limit"])
+            if last is not None:
+                if key == "_id":
+                    after = {"_id": {operator: last["_id"]}}
+                else:
+                    after = {"$or": _keyset_after(key, direction, last)}
+                condition = {"$and": [query, after]} if len(query) > 0 else after
 
-            for obj in result:
-                yield cls(obj, from_find=True, validation=validation)
+            result = cls.collection().find(condition, *args, **kwargs)
+            documents = list(result.sort(order).limit(batch_size))
+
+            if len(documents) == 0:
+                return
+
+            document = documents[-1]
+            last = {
+                "key": key,
+                "direction": direction,
+                "value": _get_path(document, key),
+                "_id": document["_id"],
+            }
+
+            yield documents, json_util.dumps(last)
+
+            if len(documents) < batch_size:
+                return
+
+    @classmethod
+    def as_dicts(cls, *args, **kwargs):
+        """ Like find(), but yields the cast documents as plain dicts instead
+        of constructing (and validating) model instances. """
+        caster = cls._caster
+
+        for document in cls.collection().find(*args, **kwargs):
+            yield document if caster is None else caster(document)
+
+    @classmethod
+    def as_tuples(cls, *args, **kwargs):
+        """ Like as_dicts(), but yields namedtuples of the schema's properties.
+        """
+        return as_tuples(cls, cls.as_dicts(*args, **kwargs))
+
+    @classmethod
+    def as_columns(cls, *args, **kwargs):
+        """ Like as_dicts(), but returns a dict with a list of values per
+        schema property. """
+        return as_columns(cls, cls.as_dicts(*args, **kwargs))
+
+    @classmethod
+    def lazy_class(cls, validation=True):
+        """ Get the lazily hydrating variant of this model class. """
+        name = "_lazy_validating" if validation else "_lazy_casting"
+
+        lazy = cls.__dict__.get(name)
+        if lazy is None:
+            lazy = make_lazy_class(cls, validation)
+            setattr(cls, name, lazy)
+
+        return lazy
 
     @classmethod
     def find_by_id(cls, obj_id, **kwargs):
-        """ Finds a single object from this collection. """
+        """ Finds a single object from this collection. Within a
+        :class:`formal.Session`, objects it has loaded are returned without
+        asking the database. """
 
         if isinstance(obj_id, str):
             obj_id = ObjectId(obj_id)
 
+        session = current_session()
+        if session is not None:
+            result = session.get(cls, obj_id)
+            if result is not None:
+                return result
+
+        # Projections would change what we cache
+        cache = cls.id_cache if len(kwargs) == 0 else None
+        if cache is not None:
+            document = cache.get(obj_id)
+            if document is not None:
+                # It was validated when it was loaded, and it's our copy
+                result = cls(document, from_find=True, validation=False, adopt=True)
+                return result if session is None else session.loaded(result)
+
         args = {"_id": obj_id}
 
+        fields = kwargs.pop("fields", None)
+        if fields is not None:
+            kwargs["projection"] = list(fields)
+
         result = cls.collection().find_one(args, **kwargs)
         if result is not None:
-            return cls(result, from_find=True)
+            result = cls(result, from_find=True, adopt=True, loaded=projection(fields))
+            if cache is not None:
+                cache.put(obj_id, result._fields)
+            return result if session is None else session.loaded(result)
         return None
 
     @classmethod
@@ -188,19 +730,36 @@ class Model(ModelBase):
         kwargs["limit"] = 1
         kwargs["sort"] = [("_id", DESCENDING)]
 
-        result = cls.collection().find(*args, **kwargs)
-
-        if result.count() > 0:
-            return cls(result[0], from_find=True)
+        for document in cls.collection().find(*args, **kwargs):
+            return cls(document, from_find=True, adopt=True)
         return None
 
     @classmethod
     def find_one(cls, *args, **kwargs):
         """ Finds a single object from this collection. """
+        if cls.id_cache is not None and len(args) == 1 and len(kwargs) == 0:
+            # Lookups by _id go through the cache
+            query = args[0]
+            if isinstance(query, dict) and len(query) == 1:
+                if isinstance(query.get("_id"), ObjectId):
+                    return cls.find_by_id(query["_id"])
+
+        fields = kwargs.pop("fields", None)
+        if fields is not None:
+            kwargs["projection"] = list(fields)
+
         result = cls.collection().find_one(*args, **kwargs)
-        if result is not None:
-            return cls(result)
-        return None
+        if result is None:
+            return None
+
+        if fields is None:
+            result = cls(result, adopt=True)
+            result._persisted = True
+        else:
+            result = cls(result, from_find=True, adopt=True, loaded=projection(fields))
+
+        session = current_session()
+        return result if session is None else session.loaded(result)
 
     @classmethod
     def count(cls, object_filter=None):
@@ -213,6 +772,49 @@ class Model(ModelBase):
 
         return cls.collection().count_documents(object_filter)
 
+    @classmethod
+    def exists(cls, object_filter=None):
+        """ Check whether any item matches `object_filter`, without counting
+        them. Only the _id of the first match is fetched. """
+        if object_filter is None:
+            object_filter = {}
+
+        return cls.collection().find_one(object_filter, {"_id": 1}) is not None
+
+    @classmethod
+    def estimated_count(cls):
+        """ Get the number of items from the collection metadata, which is
+        fast but may be off, e.g. after an unclean shutdown. """
+        return cls.collection().estimated_document_count()
+
+    @classmethod
+    def ensure_indexes(cls):
+        """ Create the indexes declared in the schema (see
+        :func:`formal.model_base.declared_indexes`) that the collection
+        doesn't have yet. Declared indexes that changed are dropped and
+        created again, others are left alone. Returns the names of the
+        created indexes. """
+        collection = cls.collection()
+        existing = collection.index_information()
+
+        missing = []
+        for keys, options in declared_indexes(cls._schema):
+            index = IndexModel(keys, **options)
+            name = index.document["name"]
+
+            current = existing.get(name)
+            if current is not None:
+                if not _index_differs(current, index.document):
+                    continue
+                collection.drop_index(name)
+
+            missing.append(index)
+
+        if len(missing) == 0:
+            return []
+
+        return collection.create_indexes(missing)
+
     @classmethod
     def collection(cls):
         """ Get the pymongo collection object for this model. Useful for
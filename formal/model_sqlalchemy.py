@@ -26,102 +26,610 @@
 SQL Support for Formal
 """
 
+import json
 import re
+import weakref
 import sqlalchemy as sql
+from sqlalchemy.dialects import mysql, postgresql, sqlite
 from deepdiff import DeepDiff
-from .model_base import DefaultValidatingDraft4Validator
-from .database import sql_database
-from jsonschema import validate, Draft4Validator, validators
+from .model_base import (
+    CLEAN,
+    MUTABLE,
+    BulkResult,
+    ChangeTrackingMixin,
+    check_replace,
+    declared_indexes,
+    missing_field,
+    partial_validator,
+    validate_changes,
+    raise_best_error,
+    validate_property,
+    as_tuples,
+    as_columns,
+    row_type,
+    watch,
+)
+from . import database
+from .exceptions import InvalidReloadException, NotLoadedError
+from .session import current_session
+from .sql_query import QueryCompiler
 from jsonschema.exceptions import ValidationError
 from copy import copy, deepcopy
 
 
-class Model(object):
-    """The SQL object model class"""
+# All SQL models model_factory has built
+models = weakref.WeakSet()
 
-    def __init__(self, original_fields=None, from_find=False, *args, **kwargs):
-        """ Creates an instance of the object."""
-        if original_fields is None:
-            original_fields = {}
 
-        self._from_find = from_find
+class JSONDocument(sql.types.TypeDecorator):
+    """ Objects and arrays, stored in a JSON column where the dialect has one
+    (JSONB on postgres) and as JSON text otherwise. """
 
-        metadata = sql.MetaData()
+    impl = sql.Text
+    cache_ok = True
 
-        self._table = sql.Table(self._schema["name"], metadata)
-        for item, value in self._schema["properties"].items():
-            # print(item)
-            column_type = value["type"].upper()
-            primary = value.get("primary", False)
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.JSONB(none_as_null=True))
+        if sql.JSON in dialect.colspecs:
+            return dialect.type_descriptor(sql.JSON(none_as_null=True))
+        return dialect.type_descriptor(sql.Text())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or sql.JSON in dialect.colspecs:
+            return value
+        return json.dumps(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or sql.JSON in dialect.colspecs:
+            return value
+        return json.loads(value)
+
+
+# Length of strings without maxLength that are keys, most databases can't
+# index unbounded text
+KEY_LENGTH = 255
+
+
+def _column_type(definition, key=False):
+    """ Get the SQLAlchemy type for a property's schema `definition`. Covers
+    the formal types (see ValidTypes), nullable types like ["string", "null"]
+    and stores anything else as JSON. Strings without a maxLength are Text,
+    unless the column is a `key` (primary or indexed). """
+
+    value_type = definition.get("type")
+
+    if isinstance(value_type, list):
+        types = [item for item in value_type if item != "null"]
+        value_type = types[0] if len(types) == 1 else None
+
+    if value_type == "integer":
+        return sql.Integer
+    if value_type == "number":
+        return sql.Float
+    if value_type == "boolean":
+        return sql.Boolean
+    if value_type == "string":
+        length = definition.get("length", definition.get("maxLength"))
+        if length is None:
+            return sql.String(KEY_LENGTH) if key else sql.Text
+        return sql.String(length)
+    if value_type == "date":
+        return sql.DateTime
+    if value_type == "object_id":
+        return sql.String(24)
+
+    # Objects, arrays and values of mixed or unknown type
+    return JSONDocument
+
+
+def _allows_null(definition):
+    """ Check whether a property's schema `definition` accepts None. """
+
+    value_type = definition.get("type")
+    if value_type is None:
+        return True
+    if isinstance(value_type, list):
+        return "null" in value_type
+    return value_type == "null"
+
+
+def _buffers_results(engine):
+    """ Check whether find() has to fetch all rows before handing them out.
+    SQLite locks file databases while a cursor reads them, so writing while
+    streaming would fail. """
+
+    url = engine.url
+    return url.get_backend_name() == "sqlite" and url.database not in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def create_all(engine=None):
+    """ Create the tables of all SQL models that don't exist yet. """
+
+    for model in list(models):
+        model.create_table(engine)
+
+
+def _insert_returning_keys(connection, table, primary, rows):
+    """ Insert `rows` and return the primary keys the database generated for
+    them, with as few statements as the dialect allows. """
+
+    dialect = connection.dialect
+    column = table.columns[primary]
+
+    if getattr(dialect, "insert_executemany_returning", False):
+        # Batched executemany with RETURNING (SQLAlchemy 2.0+)
+        try:
+            insert = table.insert().returning(column, sort_by_parameter_order=True)
+        except TypeError:
+            insert = table.insert().returning(column)
+        return [row[0] for row in connection.execute(insert, rows)]
+
+    if getattr(dialect, "full_returning", False):
+        # One multi row INSERT ... RETURNING
+        insert = table.insert().values(rows).returning(column)
+        return [row[0] for row in connection.execute(insert)]
+
+    # Dialects without RETURNING give us the key of single row inserts only
+    insert = table.insert()
+    return [connection.execute(insert, row).inserted_primary_key[0] for row in rows]
+
+
+# Dialects with INSERT ... ON CONFLICT
+ON_CONFLICT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql}
+
+
+def _index(table, keys, options, primary):
+    """ Build the SQLAlchemy index of a declared index on `table`. Returns
+    None for the primary key and for kinds of indexes SQL has no equivalent
+    of, like text or hashed ones. """
+
+    if any(not isinstance(direction, (int, float)) for _, direction in keys):
+        return None
+
+    names = [name for name, _ in keys]
+    if names == [primary]:
+        return None
 
-            if primary:
-                self._primary = item
+    expressions = []
+    for name, direction in keys:
+        if name not in table.columns:
+            raise ValueError("Unknown field in index: %s" % name)
+        column = table.columns[name]
+        expressions.append(column.desc() if direction < 0 else column)
 
-            column = sql.String(64)
+    name = options.get("name") or "ix_%s_%s" % (table.name, "_".join(names))
+    return sql.Index(name, *expressions, unique=options.get("unique", False))
 
-            if column_type == "INTEGER":
-                column = sql.Integer
-            elif column_type == "STRING":
-                length = value.get("length", 64)
-                column = sql.String(length)
 
-            self._table.append_column(sql.Column(item, column, primary_key=primary))
+def _upsert(connection, table, primary, row):
+    """ Insert `row` or replace the row with the same primary key. Uses the
+    dialect's native upsert, so this is a single statement where possible. """
 
-        from .database import sql_database
+    changes = {name: value for name, value in row.items() if name != primary}
+    dialect = connection.dialect.name
 
-        metadata.create_all(sql_database)
+    if dialect in ON_CONFLICT_DIALECTS:
+        insert = ON_CONFLICT_DIALECTS[dialect].insert(table).values(**row)
+        if len(changes) == 0:
+            insert = insert.on_conflict_do_nothing(index_elements=[primary])
+        else:
+            insert = insert.on_conflict_do_update(
+                index_elements=[primary],
+                set_={name: insert.excluded[name] for name in changes},
+            )
+        return connection.execute(insert)
+
+    if dialect == "mysql":
+        insert = mysql.insert(table).values(**row)
+        if len(changes) == 0:
+            changes = {primary: row[primary]}
+        insert = insert.on_duplicate_key_update(
+            **{name: insert.inserted[name] for name in changes}
+        )
+        return connection.execute(insert)
+
+    # No native upsert: insert, unless there already is a row to update
+    column = table.columns[primary]
+    exists = sql.select(column).where(column == row[primary])
+    if connection.execute(exists).first() is None:
+        return connection.execute(table.insert().values(**row))
+
+    if len(changes) > 0:
+        update = table.update().where(column == row[primary]).values(**changes)
+        return connection.execute(update)
+    return None
 
-        self._engine = sql_database
 
-        fields = deepcopy(dict(original_fields))
+class Model(ChangeTrackingMixin):
+    """The SQL object model class"""
+
+    __slots__ = (
+        "_fields",
+        "_from_find",
+        "_persisted",
+        "_dirty",
+        "_loaded",
+        "_watched",
+        "_upsert",
+    )
+
+    # Filled once per class by model_factory
+    _validator = None
+    _default_validator = None
+    _caster = None
+    _property_casters = None
+    _property_validators = None
+
+    # Built once per class on first use
+    _table = None
+    _table_created = None
+    _compiler = None
+    _nullable = None
+
+    # Rows fetched from the database at a time by find(), can be overridden
+    # per call with batch_size
+    fetch_size = 1000
+
+    # Cache of documents by primary key and of query results, see formal.cache
+    id_cache = None
+    query_cache = None
+
+    def __init__(self, original_fields=None, from_find=False, adopt=False,
+                 validation=True, loaded=None, *args, **kwargs):
+        """ Creates an instance of the object. With `adopt`, the object takes
+        ownership of `original_fields` instead of copying them. Partial
+        objects get the set of `loaded` columns."""
+        if original_fields is None:
+            original_fields = {}
+
+        self._loaded = loaded
+        self._from_find = from_find
+        # Objects from the database only need to write back what changed
+        self._persisted = from_find
+        self._dirty = CLEAN
+        # Fingerprints of the mutable fields handed out, see watch()
+        self._watched = None
+        # Whether saving may replace an existing row, see save()
+        self._upsert = False
+
+        if adopt:
+            fields = original_fields
+        else:
+            fields = deepcopy(dict(original_fields))
         has_id = False
         if "_id" in fields:
             has_id = True
-            del fields["_id"]
+            object_id = fields.pop("_id")
 
         # populate any default fields for objects that haven't come from the DB
         if not from_find:
-            DefaultValidatingDraft4Validator(self._schema).validate(fields)
+            known = set(fields)
+            self._default_validator.validate(fields)
+            if len(fields) > len(known):
+                self._dirty = set(fields) - known
             # for field, details in self._schema["properties"].items():
             #    if "default" in details and not field in fields:
             #        fields[field] = details["default"]
 
-        self._fields = self.cast(fields)
-        self.validate()
+        caster = self._caster
+        self._fields = fields if caster is None else caster(fields)
+        if validation:
+            self.validate()
         if has_id:
-            self._fields["_id"] = original_fields["_id"]
+            self._fields["_id"] = object_id
+
+    @classmethod
+    def table(cls):
+        """ Get the SQLAlchemy table of this model, it is built once. """
+        table = cls.__dict__.get("_table")
+        if table is not None:
+            return table
+
+        indexes = declared_indexes(cls._schema)
+        keys = {name for fields, _ in indexes for name, _ in fields}
+
+        table = sql.Table(cls._schema["name"], sql.MetaData())
+        for item, value in cls._schema["properties"].items():
+            primary = value.get("primary", False)
+            column_type = _column_type(value, key=primary or item in keys)
+            column = sql.Column(item, column_type, primary_key=primary)
+            table.append_column(column)
+
+        # The indexes belong to the table, creating it creates them
+        for fields, options in indexes:
+            _index(table, fields, options, cls._primary)
+
+        cls._table = table
+        return table
+
+    @classmethod
+    def create_table(cls, engine=None):
+        """ Create the table of this model, unless it already exists. """
+        if engine is None:
+            engine = cls.engine()
+
+        cls.table().create(engine, checkfirst=True)
+        cls._table_created = engine
+
+    @classmethod
+    def ensure_indexes(cls, engine=None):
+        """ Create the indexes declared in the schema (see
+        :func:`formal.model_base.declared_indexes`) that the table doesn't
+        have yet. Declared indexes that changed are dropped and created
+        again, others are left alone. Returns the names of the created
+        indexes. Text, hashed and TTL options only apply to MongoDB. """
+        if engine is None:
+            engine = cls._get_engine()
+        else:
+            cls.create_table(engine)
+
+        table = cls.table()
+        created = []
+
+        with engine.begin() as connection:
+            existing = {
+                index["name"]: index
+                for index in sql.inspect(connection).get_indexes(table.name)
+            }
+
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                columns = [column.name for column in index.columns]
+                current = existing.get(index.name)
+                if current is not None:
+                    unique = bool(current["unique"]) == bool(index.unique)
+                    if unique and current["column_names"] == columns:
+                        continue
+                    index.drop(connection)
+
+                index.create(connection)
+                created.append(index.name)
+
+        return created
+
+    @classmethod
+    def engine(cls):
+        """ Get the SQLAlchemy engine of this model: the default engine when
+        the model was built or the one connect_sql() registered under its
+        database_name(). """
+        engine = cls._engine
+        if engine is None:
+            engine = database.get_sql_engine(cls.database_name())
+
+        return engine
+
+    @classmethod
+    def _get_engine(cls):
+        """ Get the engine to use, after creating our table on it once. """
+        engine = cls.engine()
+        if cls.__dict__.get("_table_created") is not engine:
+            cls.create_table(engine)
+
+        return engine
 
     def reload(self):
-        """ Reload this object's data from the DB. """
-        pass
+        """ Reload this object's data from the DB, all of its columns. """
+        key = self.identity()
+        if key is None:
+            raise InvalidReloadException("Object has no primary key to reload by")
+
+        rows = self._find({self._primary: key}, limit=1)
+        row = next(rows, None)
+        rows.close()
+
+        if row is None:
+            raise InvalidReloadException(
+                "No object in the database with primary key %s" % key
+            )
+
+        self._fields = self._transform_object(row)
+        self._loaded = None
+        self._mark_clean()
 
-    def save(self, *args, **kwargs):
-        """ Saves an object to the database. """
+    def save(self, *args, upsert=False, **kwargs):
+        """ Saves an object to the database. Objects that have been loaded
+        from or saved to the database before, only UPDATE their changed
+        columns. Others are inserted, which fails if their primary key is
+        taken already. With `upsert` (and for objects find_or_create() built)
+        they replace the row with their primary key instead, using the
+        dialect's native upsert where there is one.
+
+        Within a :class:`formal.Session`, the object is written when the
+        session ends. Partial objects can only UPDATE their row.
+
+        Returns the value of the primary key, None for models without one
+        and for new objects in a session, whose key is generated when the
+        session ends. """
         self.validate()
+        check_replace(self)
+        self._sync_dirty()
+        if upsert:
+            self._upsert = True
+
+        session = current_session()
+        if session is not None:
+            session.add(self)
+            return self.identity()
+
+        if self._persisted and len(self._dirty) == 0:
+            return self.identity()
+
+        with self._get_engine().begin() as connection:
+            key = self._write(connection)
+
+        self._written(key)
+        return self.identity()
+
+    def _write(self, connection):
+        """ Write the object like save() describes, using `connection`.
+        Returns the primary key of the row. The object itself is only
+        changed by _written(), once the transaction is committed. """
+        table = self.table()
+        primary = self._primary
+        fields = self._fields
+
+        if primary is not None and fields.get(primary) is not None:
+            if self._persisted:
+                self._sync_dirty()
+                changes = {
+                    name: fields.get(name)
+                    for name in self._dirty
+                    if name in table.columns and name != primary
+                }
+                if len(changes) == 0:
+                    return fields[primary]
+
+                update = table.update().where(
+                    table.columns[primary] == fields[primary]
+                ).values(**changes)
+                connection.execute(update)
+                return fields[primary]
+
+            if self._upsert:
+                row = {name: fields.get(name) for name in table.columns.keys()}
+                _upsert(connection, table, primary, row)
+                return fields[primary]
+
+        insert = table.insert().values(**fields)
+        result = connection.execute(insert)
+
+        if primary is None:
+            return None
+        return result.inserted_primary_key[0]
+
+    def _written(self, key):
+        """ Take over the primary `key` of our committed row and forget about
+        all changes. """
+        if self._primary is not None:
+            self._fields[self._primary] = key
+
+        self._invalidate(key)
+        self._mark_clean()
+        self._upsert = False
+
+    def identity(self):
+        """ Get the key of this object in the identity map of sessions. """
+        if self._primary is None:
+            return None
+        return self._fields.get(self._primary)
+
+    @classmethod
+    def _session_group(cls):
+        """ Objects of models in the same group are flushed together. """
+        return "sql", cls.engine()
+
+    @classmethod
+    def _flush_session(cls, saved, deleted, session, result):
+        """ Write the objects of a session's flush in a single transaction. """
+        valid = []
+        for obj in saved:
+            try:
+                obj.validate()
+                check_replace(obj)
+            except (ValidationError, ValueError) as e:
+                result.errors.append((obj, {"errmsg": str(e)}))
+            else:
+                valid.append(obj)
+
+        for model in set(type(obj) for obj in valid + deleted):
+            model._get_engine()
+
+        # Objects only change once everything is committed, a rollback
+        # leaves them as they were
+        written = []
+        deleted_count = 0
+        current = None
+        try:
+            with cls.engine().begin() as connection:
+                for current in valid:
+                    written.append((current, current._write(connection)))
+
+                for current in deleted:
+                    deleted_count += current._delete(connection).rowcount
+        except sql.exc.SQLAlchemyError as e:
+            for obj in valid + deleted:
+                if obj is current:
+                    result.errors.append((obj, {"errmsg": str(e)}))
+                else:
+                    result.errors.append((obj, {"errmsg": "Rolled back"}))
+            return result
 
-        # print(**self._fields)
-        insert = self._table.insert().values(**self._fields)
-        result = self._engine.execute(insert)
-        return result.inserted_primary_key
+        for obj, key in written:
+            if obj._persisted:
+                result.modified_count += 1
+            else:
+                result.inserted_count += 1
+            obj._written(key)
+
+        for obj in deleted:
+            obj._invalidate(obj._fields[obj._primary])
+        result.deleted_count += deleted_count
+
+        return result
 
     def delete(self):
-        """ Removes an object from the database. """
+        """ Removes an object from the database. Within a
+        :class:`formal.Session`, when the session ends. """
+        session = current_session()
+        if session is not None:
+            session.delete(self)
+            return None
 
-        primary = self._fields[self._primary]
+        with self._get_engine().begin() as connection:
+            result = self._delete(connection)
 
-        query = (
-            "DELETE FROM {table_name}"
-            " WHERE {table_name}.{primary_key} = {primary}".format(
-                **{
-                    "table_name": self._schema["name"],
-                    "primary_key": self._primary,
-                    "primary": primary,
-                }
-            )
+        self._invalidate(self._fields[self._primary])
+        return result
+
+    def _delete(self, connection):
+        """ Remove the object's row using `connection`. """
+        table = self.table()
+        delete = table.delete().where(
+            table.columns[self._primary] == self._fields[self._primary]
         )
+        return connection.execute(delete)
+
+    @classmethod
+    def delete_many(cls, object_filter):
+        """ Remove all rows matching `object_filter` with a single DELETE.
+        Returns a :class:`BulkResult` with the deleted count. """
+        statement, params = cls.compiler().delete(object_filter)
+        with cls._get_engine().begin() as connection:
+            outcome = connection.execute(statement, params)
+        cls._invalidate()
+
+        result = BulkResult()
+        result.deleted_count = outcome.rowcount
+
+        return result
+
+    @classmethod
+    def update_many(cls, object_filter, changes):
+        """ Change all rows matching `object_filter` with a single UPDATE.
+        `changes` is a dict of new values or an update with "$set" and
+        "$unset", which is validated against the changed properties' schemas
+        first. Returns a :class:`BulkResult` with the matched count, which is
+        also the modified count as SQL doesn't report rows that stayed the
+        same. """
+        values, removed = validate_changes(cls, changes)
+
+        changes = dict(values)
+        for name in removed:
+            changes[name] = None
+
+        statement, params = cls.compiler().update(object_filter, changes)
+        with cls._get_engine().begin() as connection:
+            outcome = connection.execute(statement, params)
+        cls._invalidate()
+
+        result = BulkResult()
+        result.matched_count = outcome.rowcount
+        result.modified_count = outcome.rowcount
 
-        delete = sql.text(query)
-        result = self._engine.execute(delete)
         return result
 
     def serializablefields(self):
@@ -136,11 +644,66 @@ class Model(object):
         return result
 
     @classmethod
-    def bulk_create(cls, objects, *args, **kwargs):
-        """ Create a number of objects (yay performance). """
-        print("WARNING! NOT IMPLEMENTED: BULK_CREATE")
-        pass
-        # return cls.collection().insert(docs)
+    def bulk_create(cls, objects, chunk_size=1000):
+        """ Create a number of objects (yay performance). All objects are
+        validated first and then inserted with multi row INSERTs of up to
+        `chunk_size` rows within a single transaction.
+
+        Returns the primary keys of the objects in order, including those the
+        database generated, which are also stored in the objects. Once the
+        transaction is committed, the objects are persisted and clean, so
+        saving them again only writes later changes.
+        """
+        objects = list(objects)
+        if len(objects) == 0:
+            return []
+
+        for obj in objects:
+            obj.validate()
+
+        table = cls.table()
+        engine = cls._get_engine()
+        primary = cls._primary
+        columns = [name for name in table.columns.keys() if name != primary]
+
+        with_key = []
+        without_key = []
+        for obj in objects:
+            row = {name: obj._fields.get(name) for name in columns}
+            if primary is not None and obj._fields.get(primary) is None:
+                without_key.append((obj, row))
+            else:
+                if primary is not None:
+                    row[primary] = obj._fields[primary]
+                with_key.append(row)
+
+        generated = []
+        with engine.begin() as connection:
+            for start in range(0, len(with_key), chunk_size):
+                connection.execute(table.insert(), with_key[start:start + chunk_size])
+
+            for start in range(0, len(without_key), chunk_size):
+                chunk = without_key[start:start + chunk_size]
+                keys = _insert_returning_keys(
+                    connection, table, primary, [row for _, row in chunk]
+                )
+                generated.extend(zip([obj for obj, _ in chunk], keys))
+
+        # Only touch the objects once everything is committed
+        for obj, key in generated:
+            obj._fields[primary] = key
+        for obj in objects:
+            obj._mark_clean()
+
+        if primary is None:
+            cls._invalidate()
+            return [None] * len(objects)
+
+        keys = [obj._fields[primary] for obj in objects]
+        for key in keys:
+            cls._invalidate(key)
+
+        return keys
 
     @classmethod
     def find_or_create(cls, query, *args, **kwargs):
@@ -150,10 +713,12 @@ class Model(object):
         result = cls.find_one(query, *args, **kwargs)
 
         if result is None:
-            default = cls._schema.get("default", {})
+            default = deepcopy(cls._schema.get("default", {}))
             default.update(query)
 
+            # Saving it upserts, if the query names the primary key
             result = cls(default, *args, **kwargs)
+            result._upsert = True
 
         return result
 
@@ -164,68 +729,144 @@ class Model(object):
         To get a count, use the count() function which accepts the same
         arguments as find() with the exception of non-query fields like sort,
         limit, skip.
-        """
-        options = {}
-
-        for option in ["sort", "limit", "skip", "batch_size"]:
-            if option in kwargs:
-                options[option] = kwargs[option]
-                del options[option]
 
-        if "batch_size" in options and "skip" not in options and "limit" not in options:
-            # run things in batches
-            current_skip = 0
-            limit = options["batch_size"]
+        Rows are streamed from the database (with a server-side cursor where
+        the driver supports one) and fetched `batch_size` (default:
+        fetch_size) at a time, so large results are never held in memory.
+        SQLite file databases are the exception: they are locked while a
+        cursor reads them, so all rows are fetched first and objects can be
+        saved while iterating.
 
-            found_something = True
+        With fields=[...], only these columns (and the primary key) are
+        selected and the objects are partial, see :class:`NotLoadedError`.
+        """
+        columns = cls._columns(kwargs.get("fields"))
+        loaded = None if columns is None else frozenset(columns)
+
+        cache = cls.query_cache
+        key = None
+        if cache is not None:
+            # The batch size doesn't change the result
+            parts = {k: v for k, v in kwargs.items() if k != "batch_size"}
+            key = cache.key(cls, args, parts)
+
+        documents = None if key is None else cache.get(key)
+        if documents is None:
+            rows = cls._find(*args, **kwargs)
+            documents = (cls._transform_object(row, columns) for row in rows)
+            if key is not None:
+                documents = list(documents)
+                cache.put(key, documents)
+
+        session = current_session()
+        if session is None or cls._primary is None:
+            for obj in documents:
+                yield cls(obj, from_find=True, adopt=True, loaded=loaded)
+            return
+
+        # Hand out the instances the session already has
+        for obj in documents:
+            existing = session.get(cls, obj.get(cls._primary))
+            if existing is not None:
+                yield existing
+            else:
+                obj = cls(obj, from_find=True, adopt=True, loaded=loaded)
+                yield session.loaded(obj)
 
-            while found_something:
-                found_something = False
+    @classmethod
+    def as_dicts(cls, *args, **kwargs):
+        """ Like find(), but yields the cast rows as plain dicts instead of
+        constructing (and validating) model instances. """
+        caster = cls._caster
+        columns = cls._columns(kwargs.get("fields"))
 
-                result = cls.collection().find(*args, **kwargs)
-                result = result.skip(current_skip).limit(limit)
+        for row in cls._find(*args, **kwargs):
+            document = cls._transform_object(row, columns)
+            yield document if caster is None else caster(document)
 
-                if "sort" in options:
-                    result = result.sort(options["sort"])
+    @classmethod
+    def as_tuples(cls, *args, **kwargs):
+        """ Like as_dicts(), but yields namedtuples of the schema's properties.
+        """
+        if cls._caster is None and kwargs.get("fields") is None:
+            # Rows already have the right shape
+            make = row_type(cls)._make
+            return (make(row) for row in cls._find(*args, **kwargs))
 
-                for obj in result:
-                    found_something = True
-                    yield cls(obj, from_find=True)
+        return as_tuples(cls, cls.as_dicts(*args, **kwargs))
 
-                current_skip += limit
-        else:
-            result = cls._find(*args, **kwargs)
+    @classmethod
+    def as_columns(cls, *args, **kwargs):
+        """ Like as_dicts(), but returns a dict with a list of values per
+        schema property. """
+        return as_columns(cls, cls.as_dicts(*args, **kwargs))
 
-            if "sort" in options:
-                result = result.sort(options["sort"])
+    @classmethod
+    def _transform_object(cls, thing, columns=None):
+        # NULL columns are missing properties, as they would be in a document,
+        # unless the property may be None
+        if columns is None:
+            columns = cls._schema["properties"]
+
+        nullable = cls.__dict__.get("_nullable")
+        if nullable is None:
+            nullable = cls._nullable = frozenset(
+                name
+                for name, definition in cls._schema["properties"].items()
+                if _allows_null(definition)
+            )
 
-            if "skip" in options:
-                result = result.skip(options["skip"])
+        return {
+            key: value
+            for key, value in zip(columns, thing)
+            if value is not None or key in nullable
+        }
 
-            if "limit" in options:
-                result = result.limit(options["limit"])
+    @classmethod
+    def _columns(cls, fields):
+        """ Get the columns to select for a `fields` projection, the primary
+        key first. None selects all of them. """
+        if fields is None:
+            return None
 
-            for sql_thing in result.fetchall():
-                obj = cls._transform_object(sql_thing)
-                yield cls(obj, from_find=True)
+        columns = [] if cls._primary is None else [cls._primary]
+        for name in fields:
+            if name not in columns:
+                columns.append(name)
 
-    @classmethod
-    def _transform_object(cls, thing):
-        return dict(zip(cls._schema["properties"], thing))
+        return tuple(columns)
 
     @classmethod
     def find_by_id(cls, obj_id, **kwargs):
-        """ Finds a single object from this collection. """
-
-        if isinstance(obj_id, str):
-            obj_id = obj_id
-
-        args = {"_id": obj_id}
-
-        result = cls.collection().find_one(args, **kwargs)
-        if result is not None:
-            return cls(result, from_find=True)
-        return None
+        """ Finds a single object by its primary key. Within a
+        :class:`formal.Session`, objects it has loaded are returned without
+        asking the database. """
+
+        session = current_session()
+        if session is not None:
+            result = session.get(cls, obj_id)
+            if result is not None:
+                return result
+
+        cache = cls.id_cache
+        if cache is None or len(kwargs) > 0:
+            return cls.find_one({cls._primary: obj_id}, **kwargs)
+
+        document = cache.get(obj_id)
+        if document is not None:
+            # It was validated when it was loaded, and it's our copy
+            result = cls(document, from_find=True, adopt=True, validation=False)
+            return result if session is None else session.loaded(result)
+
+        rows = cls._find({cls._primary: obj_id}, limit=1)
+        row = next(rows, None)
+        rows.close()
+        if row is None:
+            return None
+
+        result = cls(cls._transform_object(row), from_find=True, adopt=True)
+        cache.put(obj_id, result._fields)
+        return result if session is None else session.loaded(result)
 
     @classmethod
     def find_latest(cls, *args, **kwargs):
@@ -233,65 +874,152 @@ class Model(object):
         kwargs["limit"] = 1
         kwargs["sort"] = (cls._primary, "DESC")
 
-        result = cls._find(*args, **kwargs)
+        rows = cls._find(*args, **kwargs)
+        result = next(rows, None)
+        rows.close()
 
-        # if result.count() > 0:
-        #    return cls(result[0], from_find=True)
-        return result.fetchone()
+        if result is not None:
+            return cls(cls._transform_object(result), from_find=True, adopt=True)
+        return None
 
     @classmethod
-    def _find(cls, *args, **kwargs):
-        # pprint(args)
-        # pprint(kwargs)
-        limit = kwargs.get("limit", False)
-        sort = kwargs.get("sort", False)
-
-        name = cls._schema["name"]
-
-        query = "SELECT %s FROM %s" % (",".join(cls._schema["properties"].keys()), name)
+    def compiler(cls):
+        """ Get the query compiler of this model, it caches the statements
+        built for the queries we've seen. """
+        compiler = cls.__dict__.get("_compiler")
+        if compiler is None:
+            compiler = QueryCompiler(cls.table())
+            cls._compiler = compiler
 
-        if len(args) > 0 and not args[0] == {}:
-            query += " WHERE"
-            # pprint(args)
+        return compiler
 
+    @classmethod
+    def _find(cls, *args, **kwargs):
+        """ Yield the rows matching the filter dicts in `args`. Supports sort,
+        limit, skip, fields and batch_size, the number of rows fetched at a
+        time. """
+        query = {}
         for item in args:
-            for key, value in item.items():
-                if isinstance(value, str):
-                    value = "'%s'" % value
-                query += " %s.%s = %s AND" % (name, key, value)
-
-        query = query.rstrip(" AND")
+            query.update(item)
+
+        statement, params = cls.compiler().select(
+            query,
+            columns=cls._columns(kwargs.get("fields")),
+            sort=kwargs.get("sort"),
+            limit=kwargs.get("limit"),
+            skip=kwargs.get("skip"),
+        )
 
-        if sort is not False:
-            query += " ORDER BY %s %s" % (sort[0], sort[1])
-        if limit is not False:
-            query += " LIMIT %i" % limit
-
-        find = sql.text(query)
-        result = cls._engine.execute(find)
-        return result
+        limit = kwargs.get("limit")
+        fetch_size = kwargs.get("batch_size") or cls.fetch_size
+        engine = cls._get_engine()
+
+        if _buffers_results(engine):
+            with engine.connect() as connection:
+                rows = connection.execute(statement, params).fetchall()
+            for row in rows:
+                yield row
+            return
+
+        with engine.connect() as connection:
+            if not limit or limit > fetch_size:
+                connection = connection.execution_options(
+                    stream_results=True, max_row_buffer=fetch_size
+                )
+
+            result = connection.execute(statement, params)
+            rows = result.fetchmany(fetch_size)
+            while rows:
+                for row in rows:
+                    yield row
+                rows = result.fetchmany(fetch_size)
 
     @classmethod
     def find_one(cls, *args, **kwargs):
         """Finds a single object from this collection."""
 
-        result = cls._find(*args, **kwargs).fetchone()
+        if cls.id_cache is not None and len(args) == 1 and len(kwargs) == 0:
+            # Lookups by primary key go through the cache
+            query = args[0]
+            if isinstance(query, dict) and list(query) == [cls._primary]:
+                if not isinstance(query[cls._primary], (dict, list)):
+                    return cls.find_by_id(query[cls._primary])
+
+        kwargs["limit"] = 1
+        columns = cls._columns(kwargs.get("fields"))
+        rows = cls._find(*args, **kwargs)
+        result = next(rows, None)
+        rows.close()
         # pprint(result)
         if result is not None:
-            return cls(result)
+            result = cls(
+                cls._transform_object(result, columns),
+                from_find=True,
+                adopt=True,
+                loaded=None if columns is None else frozenset(columns),
+            )
+
+            session = current_session()
+            if session is not None and cls._primary is not None:
+                return session.loaded(result)
+            return result
         return None
 
     @classmethod
-    def count(cls, *args, **kwargs):
-        """ Counts the number of items:
+    def count(cls, object_filter=None):
+        """ Counts the number of items matching `object_filter`, it accepts the
+        same queries as find(). """
+        statement, params = cls.compiler().count(object_filter)
+        with cls._get_engine().connect() as connection:
+            result = connection.execute(statement, params).scalar()
 
-        """
-        name = cls._schema["name"]
+        return int(result)
 
-        query = "SELECT COUNT(*) FROM %s" % name
-        proxy = cls._engine.execute(query).scalar()
+    @classmethod
+    def exists(cls, object_filter=None):
+        """ Check whether any item matches `object_filter`, without counting
+        or fetching them all. """
+        table = cls.table()
+        column = cls._primary or next(iter(table.columns.keys()))
+
+        statement, params = cls.compiler().select(
+            object_filter, columns=(column,), limit=1
+        )
+        with cls._get_engine().connect() as connection:
+            row = connection.execute(statement, params).first()
 
-        return int(proxy)
+        return row is not None
+
+    @classmethod
+    def estimated_count(cls):
+        """ Get the number of rows from the table statistics, which is fast
+        but may be outdated. Dialects without statistics count the rows. """
+        table = cls.table()
+        engine = cls._get_engine()
+
+        with engine.connect() as connection:
+            dialect = connection.dialect
+            result = None
+
+            if dialect.name == "postgresql":
+                name = dialect.identifier_preparer.format_table(table)
+                statement = sql.text(
+                    "SELECT reltuples::bigint FROM pg_class"
+                    " WHERE oid = to_regclass(:name)"
+                )
+                result = connection.execute(statement, {"name": name}).scalar()
+            elif dialect.name == "mysql":
+                statement = sql.text(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES"
+                    " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name"
+                )
+                result = connection.execute(statement, {"name": table.name}).scalar()
+
+        # Tables that were never analyzed have no (or negative) estimates
+        if result is None or result < 0:
+            return cls.count()
+
+        return int(result)
 
     @classmethod
     def clear(cls):
@@ -300,7 +1028,9 @@ class Model(object):
         query = "DELETE FROM {table_name}".format(**{"table_name": cls._schema["name"]})
 
         clear = sql.text(query)
-        result = cls._engine.execute(clear)
+        with cls._get_engine().begin() as connection:
+            result = connection.execute(clear)
+        cls._invalidate()
         return result
 
     @classmethod
@@ -351,7 +1081,14 @@ class Model(object):
 
     def get(self, field, default=None):
         """ Get a field if it exists, otherwise return the default. """
-        return self._fields.get(field, default)
+        if field not in self._fields and self._loaded is not None:
+            if field in self._schema["properties"] and field not in self._loaded:
+                raise NotLoadedError(field)
+
+        value = self._fields.get(field, default)
+        if isinstance(value, MUTABLE) and field in self._fields:
+            watch(self, field, value)
+        return value
 
     @classmethod
     def collection_name(cls):
@@ -374,6 +1111,9 @@ class Model(object):
 
     def to_dict(self):
         """ Convert the object to a dict. """
+        for name, value in self._fields.items():
+            if isinstance(value, MUTABLE):
+                watch(self, name, value)
         return self._fields
 
     def validate(self):
@@ -388,7 +1128,10 @@ class Model(object):
                 #  off object ids)
                 del fields["_id"]
 
-            validate(fields, self._schema)
+            if self._loaded is None:
+                raise_best_error(self._validator, fields)
+            else:
+                raise_best_error(partial_validator(type(self), self._loaded), fields)
         except ValidationError as e:
             raise ValidationError(
                 "Error:\n" + str(e) + "\nFields:\n" + str(self._fields)
@@ -398,7 +1141,9 @@ class Model(object):
         """ Cast the fields from Mongo into our format - necessary to convert
         floats into ints since Javascript doesn't support ints. """
         if schema is None:
-            schema = self._schema
+            # Use the function model_factory compiled for our schema
+            caster = self._caster
+            return fields if caster is None else caster(fields)
 
         value_type = schema.get("type", "object")
 
@@ -432,10 +1177,17 @@ class Model(object):
     def __getattr__(self, attr):
         """ Get an attribute from the fields we've selected. Note that if the
         field doesn't exist, this will return None. """
+        if attr.startswith("_"):
+            # Unset slots and dunder lookups, e.g. by copy
+            raise AttributeError("Item has no attribute '%s'" % attr)
+
         if attr in self._schema["properties"] and attr in self._fields:
-            return self._fields.get(attr)
+            value = self._fields[attr]
+            if isinstance(value, MUTABLE):
+                watch(self, attr, value)
+            return value
         else:
-            raise AttributeError("Item has no attribute '%s'" % attr)
+            raise missing_field(self, attr)
 
             # if attr.startswith('_'):
             #     return super(ModelBase, self).__getattr__(attr)
@@ -477,22 +1229,39 @@ class Model(object):
 
         if attr in self._schema["properties"]:
             # Check the field against our schema
-            original = self._fields[attr]
-            self._fields[attr] = value
-
-            try:
-                self.validate()
-            except ValidationError as e:
-                self._fields[attr] = original
-                raise e
+            validate_property(self, attr, value)
 
         elif not self._schema.get("additionalProperties", True):
             # not allowed to add additional properties
             raise ValidationError("Additional property '%s' not allowed!" % attr)
 
+        if attr == self._primary and value != self._fields.get(attr):
+            # Another row now, it has to be written as a whole
+            self._persisted = False
+
+        if self._loaded is not None and attr not in self._loaded:
+            # Known now, saving it sets it
+            self._loaded = self._loaded | {attr}
+
         self._fields[attr] = value
+        self._mark_dirty(attr)
         return value
 
+    def __delattr__(self, attr):
+        """ Remove one of the fields, unless it is required. Exception is on
+        "private" fields - the ones that start with _. """
+        if attr.startswith("_"):
+            return object.__delattr__(self, attr)
+
+        if attr not in self._fields:
+            raise missing_field(self, attr)
+
+        if attr in self._schema.get("required", ()):
+            raise ValidationError("'%s' is a required property" % attr)
+
+        del self._fields[attr]
+        self._mark_dirty(attr)
+
     def update(self, new_fields, update_id=False):
         """Update an object's fields"""
 
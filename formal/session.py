@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2018-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Sessions: identity map and unit of work
+
+Within a session, every object is loaded once: finding it again returns the
+same instance, find_by_id without asking the database. save() and delete()
+only register the objects, which are written when the session ends - with a
+bulk_write per collection and a transaction per SQL engine.
+
+    >>> with formal.Session():
+    ...     sweden = Country.find_by_id(sweden_id)
+    ...     sweden.name = "Sverige"
+    ...     Country({"name": "Norway"}).save()
+"""
+
+import threading
+
+from .exceptions import FlushError
+from .model_base import BulkResult
+
+_local = threading.local()
+
+
+def current_session():
+    """ Get the innermost session of this thread, or None. """
+
+    sessions = getattr(_local, "sessions", None)
+    if not sessions:
+        return None
+
+    return sessions[-1]
+
+
+class Session(object):
+    """ Context manager holding the objects loaded or saved within it and
+    writing all changes on exit. Nothing is written if the block raises. """
+
+    def __init__(self, chunk_size=1000, ordered=False):
+        self.chunk_size = chunk_size
+        self.ordered = ordered
+
+        # (model, key) -> object
+        self.identity_map = {}
+        # Objects that don't have a key yet, in the order they were saved
+        self.new = []
+        # (model, key) -> object
+        self.deleted = {}
+
+    def __enter__(self):
+        sessions = getattr(_local, "sessions", None)
+        if sessions is None:
+            sessions = _local.sessions = []
+        sessions.append(self)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.sessions.remove(self)
+
+        if exc_type is not None:
+            return False
+
+        result = self.flush()
+        if len(result.errors) > 0:
+            raise FlushError(result)
+
+        return False
+
+    def get(self, model, key):
+        """ Get the instance of `model` with `key`, if it was loaded. """
+
+        return self.identity_map.get((model, key))
+
+    def loaded(self, obj):
+        """ Register an object coming from the database. Returns the instance
+        that was loaded before, if there is one. """
+
+        key = (type(obj), obj.identity())
+        existing = self.identity_map.get(key)
+        if existing is not None:
+            return existing
+
+        self.identity_map[key] = obj
+        return obj
+
+    def add(self, obj):
+        """ Register an object to be saved when the session is flushed. """
+
+        key = obj.identity()
+        if key is None:
+            if not any(item is obj for item in self.new):
+                self.new.append(obj)
+            return
+
+        key = (type(obj), key)
+        existing = self.identity_map.get(key)
+        if existing is not None and existing is not obj:
+            raise ValueError("Another instance of %r is in the session" % (key,))
+
+        self.deleted.pop(key, None)
+        self.identity_map[key] = obj
+
+    def delete(self, obj):
+        """ Register an object to be removed when the session is flushed. """
+
+        self.new = [item for item in self.new if item is not obj]
+
+        key = obj.identity()
+        if key is None:
+            return
+
+        key = (type(obj), key)
+        self.identity_map.pop(key, None)
+        self.deleted[key] = obj
+
+    def flush(self):
+        """ Write all new and changed objects and remove the deleted ones.
+        Returns a :class:`BulkResult`, objects that could not be written are
+        in its errors. """
+
+        result = BulkResult()
+
+        # One group per collection or SQL engine, each flushed at once
+        groups = {}
+        for obj in self.new + list(self.identity_map.values()):
+            if obj.is_dirty:
+                self._group(groups, type(obj))[1].append(obj)
+        for (model, _), obj in self.deleted.items():
+            self._group(groups, model)[2].append(obj)
+
+        for model, saved, deleted in groups.values():
+            model._flush_session(saved, deleted, self, result)
+
+        failed = {id(obj) for obj, _ in result.errors}
+
+        new = []
+        for obj in self.new:
+            if id(obj) in failed or obj.identity() is None:
+                new.append(obj)
+            else:
+                self.identity_map[(type(obj), obj.identity())] = obj
+        self.new = new
+
+        deleted = {}
+        for key, obj in self.deleted.items():
+            if id(obj) in failed:
+                deleted[key] = obj
+            else:
+                # Saving it again inserts it again
+                obj._persisted = False
+        self.deleted = deleted
+
+        return result
+
+    @staticmethod
+    def _group(groups, model):
+        """ Get the (model, saved, deleted) entry of the group of `model` """
+
+        key = model._session_group()
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = (model, [], [])
+
+        return group
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2018-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Query compiler for the SQL models
+
+Translates Mongo style filter dicts into SQLAlchemy Core statements with
+bound parameters. Statements are cached by the shape of the query (its keys
+and operators), so repeated lookups with different values reuse the same
+statement - and thus SQLAlchemy's compiled statement cache.
+
+Supported operators are $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $exists,
+$regex (with $options) and the logical $and and $or. A missing value and NULL
+are the same thing in SQL, so $exists checks for NULL and $ne/$nin match NULL
+like they match missing fields in MongoDB.
+"""
+
+import operator
+from itertools import count
+
+import sqlalchemy as sql
+
+
+DESCENDING_NAMES = ("DESC", "DESCENDING")
+
+COMPARISONS = {
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+
+LOGICAL = {"$and": sql.and_, "$or": sql.or_}
+
+# Mongo's regex options that can be given inline, e.g. (?i)
+REGEX_OPTIONS = "imsx"
+
+
+def _is_operators(value):
+    """ Check whether a query value is a dict of operators like {"$gt": 1} """
+
+    return (
+        isinstance(value, dict)
+        and len(value) > 0
+        and all(key.startswith("$") for key in value)
+    )
+
+
+def _normalize_sort(sort):
+    """ Turn the supported sort specifications into a tuple of (key,
+    descending) pairs. Accepts a key, a (key, direction) pair or a list of
+    them, with directions like pymongo's (1/-1) or SQL's ("ASC"/"DESC"). """
+
+    if sort is None or sort is False:
+        return ()
+
+    if isinstance(sort, str):
+        return ((sort, False),)
+
+    if len(sort) == 2 and isinstance(sort[0], str):
+        # A single (key, direction) pair
+        sort = [sort]
+
+    result = []
+    for key, direction in sort:
+        if isinstance(direction, str):
+            descending = direction.upper() in DESCENDING_NAMES
+        else:
+            descending = direction < 0
+        result.append((key, descending))
+
+    return tuple(result)
+
+
+class QueryCompiler(object):
+    """ Builds (and caches) statements for one table """
+
+    def __init__(self, table):
+        self.table = table
+        self.statements = {}
+
+    def column(self, key):
+        """ Get the column for `key` of a query """
+
+        try:
+            return self.table.columns[key]
+        except KeyError:
+            raise ValueError("Unknown field '%s' in query" % key)
+
+    def shape(self, query, values):
+        """ Get a hashable description of the structure of `query` and append
+        its values to `values` in the order the parameters are bound. """
+
+        result = []
+
+        for key in sorted(query):
+            value = query[key]
+
+            if key in LOGICAL:
+                if not isinstance(value, (list, tuple)) or len(value) == 0:
+                    raise ValueError("%s needs a non-empty list of queries" % key)
+                parts = tuple(self.shape(part, values) for part in value)
+                result.append((key, parts))
+            elif key.startswith("$"):
+                raise ValueError("Unsupported query operator '%s'" % key)
+            elif _is_operators(value):
+                for name in sorted(value):
+                    if name == "$options":
+                        continue
+                    term = self._term(name, value[name], value, values)
+                    result.append((key,) + term)
+            else:
+                result.append((key,) + self._term("$eq", value, None, values))
+
+        return tuple(result)
+
+    def _term(self, name, value, spec, values):
+        """ Describe a single operator applied to a field as (operator,
+        argument), appending the value to bind if there is one. """
+
+        if name in ("$eq", "$ne"):
+            if value is None:
+                return name, None
+            values.append(value)
+            return name, True
+
+        if name in COMPARISONS:
+            values.append(value)
+            return name, True
+
+        if name in ("$in", "$nin"):
+            if not isinstance(value, (list, tuple, set, frozenset)):
+                raise ValueError("%s needs a list of values" % name)
+            items = [item for item in value if item is not None]
+            values.append(items)
+            # Whether None was asked for, which has to be checked separately
+            return name, len(items) != len(value)
+
+        if name == "$exists":
+            return name, bool(value)
+
+        if name == "$regex":
+            pattern = getattr(value, "pattern", value)
+            options = "".join(
+                option for option in spec.get("$options", "") if option in REGEX_OPTIONS
+            )
+            if options:
+                pattern = "(?%s)%s" % (options, pattern)
+            values.append(pattern)
+            return name, None
+
+        raise ValueError("Unsupported query operator '%s'" % name)
+
+    def where(self, shape, names):
+        """ Build the where clause for a query `shape`. Parameters are named
+        by `names` in the order of the values. """
+
+        clauses = []
+
+        for clause in shape:
+            if clause[0] in LOGICAL:
+                parts = [self.where(part, names) for part in clause[1]]
+                clauses.append(LOGICAL[clause[0]](*parts))
+            else:
+                key, name, argument = clause
+                clauses.append(self._clause(self.column(key), name, argument, names))
+
+        return sql.and_(*clauses)
+
+    def _clause(self, column, name, argument, names):
+        """ Build the expression for a single operator on `column` """
+
+        if name == "$exists":
+            return column.isnot(None) if argument else column.is_(None)
+
+        if argument is None and name == "$eq":
+            return column.is_(None)
+        if argument is None and name == "$ne":
+            return column.isnot(None)
+
+        if name == "$regex":
+            return column.regexp_match(sql.bindparam(next(names)))
+
+        if name in ("$in", "$nin"):
+            parameter = sql.bindparam(next(names), expanding=True)
+            if name == "$in":
+                clause = column.in_(parameter)
+                return sql.or_(clause, column.is_(None)) if argument else clause
+
+            clause = column.not_in(parameter)
+            if argument:
+                return sql.and_(clause, column.isnot(None))
+            return sql.or_(clause, column.is_(None))
+
+        parameter = sql.bindparam(next(names))
+
+        if name == "$eq":
+            return column == parameter
+        if name == "$ne":
+            # Mongo's $ne also matches documents without the field
+            return sql.or_(column != parameter, column.is_(None))
+
+        return COMPARISONS[name](column, parameter)
+
+    def _build(self, shape, columns, sort, limit, skip):
+        """ Build a SELECT statement for a query shape """
+
+        if columns is None:
+            statement = sql.select(self.table)
+        else:
+            statement = sql.select(*[self.column(name) for name in columns])
+
+        statement = self._filter(statement, shape)
+
+        for key, descending in sort:
+            column = self.column(key)
+            order = column.desc() if descending else column.asc()
+            statement = statement.order_by(order)
+
+        if limit:
+            statement = statement.limit(sql.bindparam("limit"))
+        if skip:
+            statement = statement.offset(sql.bindparam("offset"))
+
+        return statement
+
+    def select(self, query=None, columns=None, sort=None, limit=None, skip=None):
+        """ Get the SELECT statement and its parameters for a filter `query`.
+        """
+
+        if query is None:
+            query = {}
+
+        values = []
+        shape = self.shape(query, values)
+        sort = _normalize_sort(sort)
+        if columns is not None:
+            columns = tuple(columns)
+
+        key = ("select", shape, columns, sort, bool(limit), bool(skip))
+
+        statement = self.statements.get(key)
+        if statement is None:
+            statement = self._build(shape, columns, sort, limit, skip)
+            self.statements[key] = statement
+
+        params = _params(values)
+        if limit:
+            params["limit"] = limit
+        if skip:
+            params["offset"] = skip
+
+        return statement, params
+
+    def count(self, query=None):
+        """ Get the SELECT COUNT(*) statement and its parameters for a filter
+        `query`. """
+
+        if query is None:
+            query = {}
+
+        values = []
+        shape = self.shape(query, values)
+        key = ("count", shape)
+
+        statement = self.statements.get(key)
+        if statement is None:
+            statement = sql.select(sql.func.count()).select_from(self.table)
+            statement = self._filter(statement, shape)
+            self.statements[key] = statement
+
+        return statement, _params(values)
+
+    def delete(self, query=None):
+        """ Get the DELETE statement and its parameters for a filter `query`.
+        """
+
+        values = []
+        shape = self.shape(query or {}, values)
+        key = ("delete", shape)
+
+        statement = self.statements.get(key)
+        if statement is None:
+            statement = self._filter(self.table.delete(), shape)
+            self.statements[key] = statement
+
+        return statement, _params(values)
+
+    def update(self, query, changes):
+        """ Get the UPDATE statement setting the columns to the values in the
+        dict `changes` and its parameters for a filter `query`. """
+
+        values = []
+        shape = self.shape(query or {}, values)
+        columns = tuple(sorted(changes))
+        key = ("update", shape, columns)
+
+        statement = self.statements.get(key)
+        if statement is None:
+            # Named apart from the columns, SQLAlchemy reserves those
+            assignments = {
+                self.column(name): sql.bindparam("set_%s" % name) for name in columns
+            }
+            statement = self._filter(self.table.update(), shape).values(assignments)
+            self.statements[key] = statement
+
+        params = _params(values)
+        for name in columns:
+            params["set_%s" % name] = changes[name]
+
+        return statement, params
+
+    def _filter(self, statement, shape):
+        """ Add the where clause for a query `shape` to `statement` """
+
+        if len(shape) == 0:
+            return statement
+
+        names = ("p%i" % index for index in count())
+        return statement.where(self.where(shape, names))
+
+
+def _params(values):
+    """ Name the values of a query like the compiler names its parameters """
+
+    return {"p%i" % index: value for index, value in enumerate(values)}
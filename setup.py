@@ -62,10 +62,10 @@ Allows you to build models validated against a JSON-schema file, and save
 them to MongoDB or SQL based databases.
 """,
     install_requires=[
-        "pymongo>=3.2",
+        "pymongo>=3.9",
         "jsonschema>=3.0.2",
         "deepdiff>=3.2.1",
-        "sqlalchemy>=1.2.14",
+        "sqlalchemy>=1.4",
     ],
     test_suite="tests",
     use_scm_version={"write_to": "formal/scm_version.py"},
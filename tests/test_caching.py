@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Test the object cache of find_by_id and the query cache of find
+"""
+
+import unittest
+
+import formal
+from formal.cache import ObjectCache, QueryCache
+
+
+class CountingStore(object):
+    """ Stand-in for an external store of the query cache """
+
+    def __init__(self):
+        self.values = {}
+        self.sets = 0
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.sets += 1
+        self.values[key] = value
+
+
+class TestObjectCache(unittest.TestCase):
+    def testLRU(self):
+        """ Test that the least recently used documents are evicted """
+
+        cache = ObjectCache(size=2)
+        cache.put("a", {"x": 1})
+        cache.put("b", {"x": 2})
+        cache.get("a")
+        cache.put("c", {"x": 3})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual({"x": 1}, cache.get("a"))
+        self.assertEqual(
+            {"hits": 2, "misses": 1, "evictions": 1, "size": 2}, cache.stats()
+        )
+
+    def testTTL(self):
+        """ Test that documents expire """
+
+        now = [100.0]
+        cache = ObjectCache(ttl=10, clock=lambda: now[0])
+        cache.put("a", {"x": 1})
+
+        now[0] = 109.0
+        self.assertIsNotNone(cache.get("a"))
+        now[0] = 110.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(1, cache.evictions)
+
+    def testCopies(self):
+        """ Test that changing documents doesn't change the cached ones """
+
+        document = {"x": [1]}
+        cache = ObjectCache()
+        cache.put("a", document)
+        document["x"].append(2)
+        cache.get("a")["x"].append(3)
+
+        self.assertEqual({"x": [1]}, cache.get("a"))
+
+
+class TestCaching(unittest.TestCase):
+    def setUp(self):
+        """Set up the test scaffolding"""
+        self.schema = {
+            "name": "Country",
+            "id": "#Country",
+            "cache": {"size": 10},
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string"},
+                "languages": {"type": "array", "items": {"type": "string"}},
+            },
+            "additionalProperties": False,
+        }
+
+        # Connect to formal_test - hopefully it doesn't exist
+        formal.connect("formal_test")
+        self.Country = formal.model_factory(self.schema)
+
+        # Drop all the data in it
+        self.Country.collection().delete_many({})
+
+        self.sweden = self.Country(
+            {"name": "Sweden", "abbreviation": "SE", "languages": ["swedish"]}
+        )
+        self.sweden.save()
+
+    def testCaching(self):
+        """ Test that lookups by _id are cached """
+
+        cache = self.Country.id_cache
+
+        sweden = self.Country.find_by_id(self.sweden._id)
+        self.assertEqual(1, cache.misses)
+
+        # Changing it doesn't change the cached one
+        sweden.languages.append("finnish")
+
+        again = self.Country.find_one({"_id": self.sweden._id})
+        self.assertEqual(1, cache.hits)
+        self.assertIsNot(sweden, again)
+        self.assertEqual(["swedish"], again.languages)
+        self.assertFalse(again.is_dirty)
+
+    def testInvalidation(self):
+        """ Test that writes drop the cached documents """
+
+        cache = self.Country.id_cache
+        self.Country.find_by_id(self.sweden._id)
+
+        self.sweden.name = "Sverige"
+        self.sweden.save()
+        self.assertEqual("Sverige", self.Country.find_by_id(self.sweden._id).name)
+
+        self.Country.bulk_save([self.Country.find_by_id(self.sweden._id)])
+        self.Country.update_many({}, {"name": "Sweden"})
+        self.assertEqual(0, len(cache))
+        self.assertEqual("Sweden", self.Country.find_by_id(self.sweden._id).name)
+
+        self.sweden.delete()
+        self.assertIsNone(self.Country.find_by_id(self.sweden._id))
+
+    def testCachingSQL(self):
+        """ Test that SQL lookups by primary key are cached """
+
+        formal.connect_sql(url="sqlite://")
+        schema = {
+            "name": "CachedCountry",
+            "sql": True,
+            "id": "#CachedCountry",
+            "cache": True,
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string", "primary": True},
+            },
+        }
+        Country = formal.model_factory(schema)
+        Country({"name": "Sweden", "abbreviation": "SE"}).save()
+
+        self.assertEqual("Sweden", Country.find_by_id("SE").name)
+        sweden = Country.find_one({"abbreviation": "SE"})
+        self.assertEqual(1, Country.id_cache.hits)
+
+        sweden.name = "Sverige"
+        sweden.save()
+        self.assertEqual(0, len(Country.id_cache))
+        self.assertEqual("Sverige", Country.find_by_id("SE").name)
+
+        Country.clear()
+        self.assertIsNone(Country.find_by_id("SE"))
+
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        """Set up the test scaffolding"""
+        self.schema = {
+            "name": "Country",
+            "id": "#Country",
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string"},
+            },
+            "additionalProperties": False,
+        }
+
+        formal.connect("formal_test")
+        self.Country = formal.model_factory(self.schema)
+        self.Country.collection().delete_many({})
+        self.Country.query_cache = QueryCache(CountingStore())
+
+        self.sweden = self.Country({"name": "Sweden", "abbreviation": "SE"})
+        self.sweden.save()
+
+    def assertFinds(self, model, names, hit):
+        """ find() gives `names`, from the cache if `hit` """
+
+        cache = model.query_cache
+        hits = cache.hits
+
+        found = [country.name for country in model.find({}, sort=[("name", 1)])]
+        self.assertEqual(names, found)
+        self.assertEqual(hits + 1 if hit else hits, cache.hits)
+
+    def testQueryCache(self):
+        """ Test that results are cached until the model is written to """
+
+        self.assertFinds(self.Country, ["Sweden"], False)
+        self.assertFinds(self.Country, ["Sweden"], True)
+
+        # Other queries have their own entries
+        list(self.Country.find({"name": "Norway"}))
+        list(self.Country.find({}, sort=[("name", 1)], limit=1))
+        self.assertEqual(3, self.Country.query_cache.store.sets)
+
+        self.Country({"name": "Norway", "abbreviation": "NO"}).save()
+        self.assertFinds(self.Country, ["Norway", "Sweden"], False)
+        self.assertFinds(self.Country, ["Norway", "Sweden"], True)
+
+        self.sweden.delete()
+        self.assertFinds(self.Country, ["Norway"], False)
+
+        self.Country.update_many({}, {"name": "Norge"})
+        self.assertFinds(self.Country, ["Norge"], False)
+
+        self.Country.bulk_create([self.Country({"name": "Denmark"})])
+        self.assertFinds(self.Country, ["Denmark", "Norge"], False)
+
+    def testQueryCacheCopies(self):
+        """ Test that changing found objects doesn't change cached ones """
+
+        sweden = next(self.Country.find())
+        sweden.name = "Sverige"
+
+        self.assertEqual("Sweden", next(self.Country.find()).name)
+        self.assertEqual(1, self.Country.query_cache.hits)
+
+    def testQueryCacheKeyOrder(self):
+        """ Test that only the order of options doesn't change the key """
+
+        cache = self.Country.query_cache
+        first = {"capital": {"name": "Stockholm", "lat": 59}}
+        second = {"capital": {"lat": 59, "name": "Stockholm"}}
+
+        self.assertNotEqual(
+            cache.key(self.Country, (first,), {}),
+            cache.key(self.Country, (second,), {}),
+        )
+        self.assertEqual(
+            cache.key(self.Country, (first,), {"limit": 1, "skip": 2}),
+            cache.key(self.Country, (first,), {"skip": 2, "limit": 1}),
+        )
+
+    def testQueryCacheSharedCollection(self):
+        """ Test that writes through any model of a collection make cached
+        results stale """
+
+        class Kingdom(self.Country):
+            __slots__ = ()
+
+        self.assertFinds(self.Country, ["Sweden"], False)
+        Kingdom({"name": "Denmark", "abbreviation": "DK"}).save()
+        self.assertFinds(self.Country, ["Denmark", "Sweden"], False)
+
+        # Another model class of the collection, with the same store
+        Other = formal.model_factory(self.schema)
+        Other.query_cache = QueryCache(self.Country.query_cache.store)
+        self.assertFinds(Other, ["Denmark", "Sweden"], True)
+
+        Other.delete_many({"name": "Denmark"})
+        self.assertFinds(self.Country, ["Sweden"], False)
+
+    def testQueryCacheSQL(self):
+        """ Test the query cache of SQL models """
+
+        formal.connect_sql(url="sqlite://")
+        schema = {
+            "name": "QueryCachedCountry",
+            "sql": True,
+            "id": "#QueryCachedCountry",
+            "queryCache": {"size": 10},
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string", "primary": True},
+            },
+        }
+        Country = formal.model_factory(schema)
+        Country({"name": "Sweden", "abbreviation": "SE"}).save()
+
+        self.assertFinds(Country, ["Sweden"], False)
+        self.assertFinds(Country, ["Sweden"], True)
+
+        Country({"name": "Norway", "abbreviation": "NO"}).save()
+        self.assertFinds(Country, ["Norway", "Sweden"], False)
+
+        Country.bulk_create([Country({"name": "Denmark", "abbreviation": "DK"})])
+        self.assertFinds(Country, ["Denmark", "Norway", "Sweden"], False)
+
+        Country.delete_many({"abbreviation": "DK"})
+        self.assertFinds(Country, ["Norway", "Sweden"], False)
+
+        Country.clear()
+        self.assertFinds(Country, [], False)
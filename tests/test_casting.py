@@ -34,7 +34,10 @@ been added in accordance to the Apache License 2.0
 
 import unittest
 
+from bson import ObjectId
+
 import formal
+from formal.model_base import compile_caster
 
 
 class TestValidation(unittest.TestCase):
@@ -95,3 +98,85 @@ class TestValidation(unittest.TestCase):
 
         self.assertEqual(5, fields["field"])
         self.assertEqual("5", fields["other_field"])
+
+    def testCastObjectId(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "field": {"type": "string"},
+                "references": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"target": {"type": "object_id"}},
+                    },
+                },
+            },
+        }
+        caster = compile_caster(schema)
+
+        target = ObjectId("45cbc4a0e4123f6920000002")
+        old_fields = {"field": "5", "references": [{"target": target}, {}]}
+
+        fields = caster(old_fields)
+
+        self.assertEqual(str(target), fields["references"][0]["target"])
+        self.assertEqual({}, fields["references"][1])
+        # The original document is left alone
+        self.assertEqual(target, old_fields["references"][0]["target"])
+
+    def testNothingToCast(self):
+        schema = {
+            "name": "Model",
+            "id": "#Model",
+            "properties": {
+                "field": {"type": "string"},
+                "other_field": {"type": "array", "items": {"type": "number"}},
+            },
+        }
+        model = formal.model_factory(schema)
+
+        m = model()
+
+        old_fields = {"field": "5", "other_field": [5.2]}
+
+        self.assertIsNone(model._caster)
+        self.assertIs(old_fields, m.cast(old_fields))
+
+    def testAdoptFields(self):
+        schema = {
+            "name": "Model",
+            "id": "#Model",
+            "properties": {
+                "field": {"type": "array", "items": {"type": "string"}},
+            },
+        }
+        model = formal.model_factory(schema)
+
+        document = {"_id": ObjectId(), "field": ["a", "b"]}
+        object_id = document["_id"]
+
+        copied = model(document, from_find=True)
+        adopted = model(document, from_find=True, adopt=True)
+
+        self.assertIsNot(document["field"], copied.field)
+        self.assertIs(document["field"], adopted.field)
+        self.assertEqual(object_id, adopted._fields["_id"])
+
+    def testDefaultsAreCopied(self):
+        schema = {
+            "name": "Model",
+            "id": "#Model",
+            "properties": {
+                "field": {"type": "array", "items": {"type": "string"}, "default": []},
+            },
+        }
+        model = formal.model_factory(schema)
+
+        first = model()
+        second = model()
+
+        first.field.append("a")
+
+        self.assertEqual([], second.field)
+        self.assertEqual([], model._schema["properties"]["field"]["default"])
@@ -26,7 +26,13 @@
 Test SQL support. WiP!
 """
 
+import os
+import tempfile
 import unittest
+from datetime import datetime
+
+import sqlalchemy
+from bson import ObjectId
 
 import formal
 
@@ -78,3 +84,367 @@ class TestCreatingSQL(unittest.TestCase):
         self.assertEqual("Canada", canada.name)
         self.assertEqual("CA", canada.abbreviation)
         self.assertEqual(1, canada.dialcode)
+
+    def testResultModesSQL(self):
+        """ Test getting plain data instead of objects """
+
+        rows = list(self.Country.as_tuples({"dialcode": 46}))
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual("Sweden", rows[0].name)
+        self.assertEqual(46, rows[0].dialcode)
+
+        self.assertEqual(
+            [{"name": "Sweden", "abbreviation": "SE", "dialcode": 46}],
+            list(self.Country.as_dicts({"abbreviation": "SE"})),
+        )
+
+        columns = self.Country.as_columns({})
+
+        self.assertEqual({"SE", "US"}, set(columns["abbreviation"]))
+
+    def testQueriesSQL(self):
+        """ Test that values are bound, not pasted into the SQL """
+
+        self.Country(
+            {"name": "Côte d'Ivoire", "abbreviation": "CI", "dialcode": 225}
+        ).save()
+
+        country = self.Country.find_one({"name": "Côte d'Ivoire"})
+        self.assertEqual("CI", country.abbreviation)
+
+        self.assertIsNone(self.Country.find_one({"name": "x' OR '1'='1"}))
+
+        names = [c.name for c in self.Country.find({}, sort=("dialcode", -1), limit=2)]
+        self.assertEqual(["Côte d'Ivoire", "Sweden"], names)
+
+        found = self.Country.find({}, sort="dialcode", skip=1, limit=1)
+        names = [c.name for c in found]
+        self.assertEqual(["Sweden"], names)
+
+        # Same shape, other values: the statement is reused
+        compiler = self.Country.compiler()
+        first, _ = compiler.select({"abbreviation": "SE"})
+        second, params = compiler.select({"abbreviation": "US"})
+        self.assertIs(first, second)
+        self.assertEqual({"p0": "US"}, params)
+
+    def testCountSQL(self):
+        """ Test counting and checking for matches """
+
+        self.assertEqual(2, self.Country.count())
+        self.assertEqual(1, self.Country.count({"dialcode": {"$gt": 10}}))
+        self.assertEqual(0, self.Country.count({"abbreviation": "CA"}))
+
+        self.assertTrue(self.Country.exists({"abbreviation": "SE"}))
+        self.assertFalse(self.Country.exists({"dialcode": {"$lt": 0}}))
+
+        # sqlite has no statistics, so this is a real count
+        self.assertEqual(2, self.Country.estimated_count())
+
+        self.assertEqual("US", self.Country.find_latest().abbreviation)
+
+    def testStreamingSQL(self):
+        """ Test fetching rows in batches """
+
+        self.Country({"name": "Canada", "abbreviation": "CA", "dialcode": 1}).save()
+
+        found = self.Country.find({}, sort="abbreviation", batch_size=2)
+        self.assertEqual(["CA", "SE", "US"], [c.abbreviation for c in found])
+
+        found = self.Country.find({"dialcode": 1}, batch_size=1, skip=1)
+        self.assertEqual(1, len(list(found)))
+
+    def testUpdateSQL(self):
+        """ Test that saving a loaded object only updates its changed columns """
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = formal.database.sql_database
+        sqlalchemy.event.listen(engine, "before_cursor_execute", record)
+
+        try:
+            sweden = self.Country.find_one({"abbreviation": "SE"})
+            self.assertFalse(sweden.is_dirty)
+
+            sweden.dialcode = 460
+            self.assertEqual({"dialcode"}, sweden.changed_fields())
+
+            del statements[:]
+            sweden.save()
+
+            self.assertEqual(1, len(statements))
+            self.assertTrue(statements[0].startswith("UPDATE"))
+            self.assertIn("dialcode", statements[0])
+            self.assertNotIn("name", statements[0])
+            self.assertFalse(sweden.is_dirty)
+
+            # Nothing changed, nothing to write
+            del statements[:]
+            sweden.save()
+            self.assertEqual([], statements)
+        finally:
+            sqlalchemy.event.remove(engine, "before_cursor_execute", record)
+
+        self.assertEqual(2, self.Country.count())
+        self.assertEqual(460, self.Country.find_one({"abbreviation": "SE"}).dialcode)
+
+    def testUpsertSQL(self):
+        """ Test that only upserts replace rows with the same primary key """
+
+        with self.assertRaises(sqlalchemy.exc.IntegrityError):
+            self.Country({"name": "Typo", "abbreviation": "SE"}).save()
+        self.assertEqual(46, self.Country.find_one({"abbreviation": "SE"}).dialcode)
+
+        self.Country({"name": "Sverige", "abbreviation": "SE"}).save(upsert=True)
+
+        self.assertEqual(2, self.Country.count())
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        self.assertEqual("Sverige", sweden.name)
+        self.assertIsNone(sweden.get("dialcode"))
+
+        germany = self.Country.find_or_create({"abbreviation": "DE"})
+        self.assertTrue(germany.is_dirty)
+        germany.name = "Germany"
+        germany.save()
+
+        germany = self.Country.find_or_create({"abbreviation": "DE"})
+        self.assertFalse(germany.is_dirty)
+        self.assertEqual("Germany", germany.name)
+        self.assertEqual(3, self.Country.count())
+
+    def testNullColumnsSQL(self):
+        """ Test that NULL is read back as None where the schema allows it """
+
+        schema = {
+            "name": "Note",
+            "sql": True,
+            "id": "#Note",
+            "properties": {
+                "nid": {"type": "integer", "primary": True},
+                "title": {"type": ["string", "null"]},
+                "text": {"type": "string"},
+            },
+            "required": ["nid", "title"],
+        }
+        Note = formal.model_factory(schema)
+
+        Note({"nid": 1, "title": None}).save()
+
+        notes = list(Note.find())
+        self.assertEqual(1, len(notes))
+        self.assertIsNone(notes[0].title)
+        # Other NULL columns are still missing properties
+        self.assertNotIn("text", notes[0].to_dict())
+        self.assertEqual({"nid": 1, "title": None}, next(Note.as_dicts()))
+
+    def testSaveReturnsKeySQL(self):
+        """ Test that save() returns the primary key on every path """
+
+        schema = {
+            "name": "Village",
+            "sql": True,
+            "id": "#Village",
+            "properties": {
+                "villageid": {"type": "integer", "primary": True},
+                "name": {"type": "string"},
+            },
+        }
+        Village = formal.model_factory(schema)
+
+        village = Village({"name": "Bullerbyn"})
+        key = village.save()
+        self.assertIsInstance(key, int)
+        self.assertEqual(village.villageid, key)
+
+        # Nothing to write, an UPDATE and an upsert
+        self.assertEqual(key, village.save())
+        village.name = "Bullerbyn by"
+        self.assertEqual(key, village.save())
+        self.assertEqual(
+            key, Village({"villageid": key, "name": "B"}).save(upsert=True)
+        )
+
+        with formal.Session():
+            village.name = "Bullerbyn"
+            self.assertEqual(key, village.save())
+            self.assertIsNone(Village({"name": "Lönneberga"}).save())
+
+        self.assertEqual("DK", self.Country({"abbreviation": "DK"}).save())
+
+    def testBulkCreateSQL(self):
+        """ Test inserting many rows at once """
+
+        schema = {
+            "name": "City",
+            "sql": True,
+            "id": "#City",
+            "properties": {
+                "cityid": {"type": "integer", "primary": True},
+                "name": {"type": "string"},
+                "country": {"type": "string"},
+            },
+        }
+        City = formal.model_factory(schema)
+
+        cities = [City({"name": "City %i" % i, "country": "SE"}) for i in range(5)]
+        cities.append(City({"cityid": 100, "name": "Malmö", "country": "SE"}))
+
+        keys = City.bulk_create(cities, chunk_size=2)
+
+        self.assertEqual(6, len(keys))
+        self.assertEqual(100, keys[-1])
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertEqual(keys[0], cities[0].cityid)
+        self.assertEqual(6, City.count())
+        self.assertEqual("Malmö", list(City.as_dicts({"cityid": 100}))[0]["name"])
+
+        # The objects are persisted, saving them again only writes changes
+        self.assertFalse(any(city.is_dirty for city in cities))
+        cities[0].name = "Lund"
+        self.assertEqual(keys[0], cities[0].save())
+        cities[1].save()
+        self.assertEqual(6, City.count())
+        self.assertEqual("Lund", City.find_by_id(keys[0]).name)
+
+    def testSaveWhileIteratingSQL(self):
+        """ Test saving the objects find() yields from a SQLite file """
+
+        schema = {
+            "name": "Item",
+            "sql": True,
+            "id": "#Item",
+            "databaseName": "items",
+            "properties": {
+                "itemid": {"type": "integer", "primary": True},
+                "stock": {"type": "integer"},
+            },
+        }
+
+        Item = formal.model_factory(schema)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "items.db")
+            engine = formal.connect_sql(url="sqlite:///%s" % path, name="items")
+            try:
+                Item.bulk_create(Item({"stock": i}) for i in range(250))
+
+                for item in Item.find({}, batch_size=100):
+                    item.stock += 1
+                    item.save()
+
+                self.assertEqual(0, Item.count({"stock": 0}))
+                self.assertEqual(250, Item.count({"stock": {"$gte": 1}}))
+            finally:
+                formal.sql_models.discard(Item)
+                del formal.database.sql_engines["items"]
+                engine.dispose()
+
+    def testColumnTypesSQL(self):
+        """ Test that all types are stored in fitting columns """
+
+        schema = {
+            "name": "Station",
+            "sql": True,
+            "id": "#Station",
+            "properties": {
+                "stationid": {"type": "integer", "primary": True},
+                "name": {"type": "string", "maxLength": 200},
+                "height": {"type": "number"},
+                "active": {"type": "boolean"},
+                "comment": {"type": ["string", "null"]},
+                "position": {"type": "object"},
+                "sensors": {"type": "array", "items": {"type": "string"}},
+                "extra": {},
+                "installed": {"type": "date"},
+                "operator": {"type": "object_id"},
+                "code": {"type": "string", "index": True},
+            },
+        }
+        Station = formal.model_factory(schema)
+
+        columns = Station.table().columns
+        self.assertIsInstance(columns["height"].type, sqlalchemy.Float)
+        self.assertIsInstance(columns["active"].type, sqlalchemy.Boolean)
+        self.assertEqual(200, columns["name"].type.length)
+        self.assertIsInstance(columns["comment"].type, sqlalchemy.Text)
+        self.assertIsInstance(columns["installed"].type, sqlalchemy.DateTime)
+        self.assertEqual(24, columns["operator"].type.length)
+        self.assertEqual(255, columns["code"].type.length)
+
+        fields = {
+            "name": "A" * 100,
+            "comment": "B" * 1000,
+            "installed": datetime(2019, 5, 1, 12, 30),
+            "operator": str(ObjectId()),
+            "height": 1.5,
+            "active": True,
+            "position": {"lat": 59.3, "lon": 18.1},
+            "sensors": ["wind", "rain"],
+            "extra": [1, "two"],
+        }
+        Station(fields).save()
+        Station({"name": "Low", "height": -3.25, "active": False}).save()
+
+        station = Station.find_one({"active": True})
+        station.sensors.append("snow")
+        station.save()
+        station = Station.find_one({"active": True})
+        self.assertEqual(["wind", "rain", "snow"], station.sensors)
+
+        del station.stationid
+        fields["sensors"].append("snow")
+        self.assertEqual(fields, station.to_dict())
+
+        found = Station.find({"height": {"$lt": 1}})
+        self.assertEqual(["Low"], [s.name for s in found])
+        self.assertEqual(1, Station.count({"position": None}))
+
+    def testNamedEnginesSQL(self):
+        """ Test routing models to other SQL databases """
+
+        engine = formal.connect_sql(url="sqlite://", name="archive", pool_pre_ping=True)
+        self.assertFalse(engine.echo)
+        self.assertIsNot(engine, formal.database.sql_database)
+
+        schema = dict(self.schema, databaseName="archive")
+        ArchivedCountry = formal.model_factory(schema)
+        self.assertIs(engine, ArchivedCountry.engine())
+
+        ArchivedCountry({"name": "Prussia", "abbreviation": "PR"}).save()
+
+        self.assertEqual(1, ArchivedCountry.count())
+        self.assertEqual(2, self.Country.count())
+
+        schema = dict(self.schema, databaseName="nowhere")
+        with self.assertRaises(formal.database.NotConnected):
+            formal.model_factory(schema).count()
+
+    def testTableCreatedOnce(self):
+        """ Test that the table is built and created once per model """
+
+        schema = {
+            "name": "Town",
+            "sql": True,
+            "id": "#Town",
+            "properties": {
+                "name": {"type": "string", "primary": True},
+            },
+        }
+        Town = formal.model_factory(schema)
+
+        self.assertIs(Town.table(), Town.table())
+
+        engine = formal.database.sql_database
+        self.assertFalse(sqlalchemy.inspect(engine).has_table("Town"))
+
+        formal.create_all()
+
+        self.assertTrue(sqlalchemy.inspect(engine).has_table("Town"))
+
+        town = Town({"name": "Kiruna"})
+        town._note = "mine"
+        self.assertEqual({"_note": "mine"}, town.__dict__)
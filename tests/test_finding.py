@@ -35,6 +35,7 @@ been added in accordance to the Apache License 2.0
 import unittest
 
 import formal
+from jsonschema.exceptions import ValidationError
 
 
 class TestFinding(unittest.TestCase):
@@ -96,6 +97,20 @@ class TestFinding(unittest.TestCase):
         self.assertEqual(1, self.Country.count({"abbreviation": "SE"}))
         self.assertEqual(0, self.Country.count({"abbreviation": "CA"}))
 
+    def testExists(self):
+        """ Test checking for matches without counting them """
+        self.assertTrue(self.Country.exists())
+        self.assertTrue(self.Country.exists({"abbreviation": "SE"}))
+        self.assertFalse(self.Country.exists({"abbreviation": "CA"}))
+        self.assertEqual(2, self.Country.estimated_count())
+
+    def testFindLatest(self):
+        """ Test getting the last object that was created """
+        latest = self.Country.find_latest()
+
+        self.assertEqual("US", latest.abbreviation)
+        self.assertIsNone(self.Country.find_latest({"abbreviation": "CA"}))
+
     def testFindAll(self):
         """ Test fetching everything the mongo way """
 
@@ -106,3 +121,118 @@ class TestFinding(unittest.TestCase):
 
         self.assertEqual(1, len(countries))
         self.assertEqual("Sweden", countries[0].name)
+
+    def testFindLazy(self):
+        """ Test lazily hydrated results """
+
+        countries = list(self.Country.find({"abbreviation": "SE"}, lazy=True))
+
+        self.assertEqual(1, len(countries))
+
+        sweden = countries[0]
+
+        self.assertIsInstance(sweden, self.Country)
+        self.assertIsNot(self.Country, type(sweden))
+        self.assertEqual("Sweden", sweden.name)
+        self.assertEqual(["swedish"], sweden.languages)
+        self.assertFalse(sweden.is_dirty)
+
+        # Writing turns it into a normal object
+        sweden.name = "Sverige"
+
+        self.assertIs(self.Country, type(sweden))
+        self.assertEqual({"name"}, sweden.changed_fields())
+
+        sweden.save()
+
+        self.assertEqual("Sverige", self.Country.find_one({"abbreviation": "SE"}).name)
+
+    def testFindLazyValidation(self):
+        """ Test that lazy results validate the fields that are read """
+
+        self.Country.collection().update_one(
+            {"abbreviation": "US"}, {"$set": {"name": 5}}
+        )
+
+        usa = next(self.Country.find({"abbreviation": "US"}, lazy=True))
+
+        self.assertEqual("US", usa.abbreviation)
+        self.assertRaises(ValidationError, getattr, usa, "name")
+
+    def testResultModes(self):
+        """ Test getting plain data instead of objects """
+
+        sort = [("abbreviation", formal.ASCENDING)]
+
+        dicts = list(self.Country.as_dicts({}, sort=sort))
+
+        self.assertEqual(2, len(dicts))
+        self.assertIsInstance(dicts[0], dict)
+        self.assertEqual("Sweden", dicts[0]["name"])
+
+        tuples = list(self.Country.as_tuples({}, sort=sort))
+
+        self.assertEqual("SE", tuples[0].abbreviation)
+        self.assertEqual(["english"], tuples[1].languages)
+
+        columns = self.Country.as_columns({}, sort=sort)
+
+        self.assertEqual(["SE", "US"], columns["abbreviation"])
+        self.assertEqual(["Sweden", "United States of America"], columns["name"])
+
+    def testFindBatches(self):
+        """ Test paginating through everything in batches """
+
+        self.Country(
+            {"name": "Canada", "abbreviation": "CA", "languages": ["english"]}
+        ).save()
+
+        countries = list(self.Country.find({}, batch_size=2))
+
+        self.assertEqual(3, len(countries))
+        self.assertEqual(3, len(set(str(c._id) for c in countries)))
+
+        sort = [("name", formal.DESCENDING)]
+        batches = self.Country.find_batches({}, batch_size=2, sort=sort)
+
+        objects, token = next(batches)
+
+        self.assertEqual(
+            ["United States of America", "Sweden"], [c.name for c in objects]
+        )
+
+        # Continue where we stopped, e.g. in another process
+        resumed = self.Country.find({}, batch_size=2, sort=sort, resume_token=token)
+        resumed = list(resumed)
+
+        self.assertEqual(["Canada"], [c.name for c in resumed])
+
+    def testFindBatchesSparse(self):
+        """ Test batches sorted by a key some documents don't have """
+
+        Player = formal.model_factory(
+            {
+                "name": "Player",
+                "id": "#Player",
+                "properties": {
+                    "name": {"type": "string"},
+                    "rank": {"type": ["integer", "null"]},
+                },
+            }
+        )
+        Player.collection().delete_many({})
+        for player in [
+            {"name": "a"},
+            {"name": "b", "rank": 1},
+            {"name": "c", "rank": 2},
+            {"name": "d", "rank": None},
+        ]:
+            Player(player).save()
+
+        for direction in (formal.ASCENDING, formal.DESCENDING):
+            sort = [("rank", direction)]
+            expected = [p.name for p in Player.find({}, sort=sort, batch_size=10)]
+            self.assertEqual(4, len(expected))
+
+            found = [p.name for p in Player.find({}, sort=sort, batch_size=1)]
+            self.assertEqual(expected, found)
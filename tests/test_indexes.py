@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Test the indexes declared in schemas
+"""
+
+import unittest
+from copy import deepcopy
+
+import sqlalchemy
+
+import formal
+from formal.model_base import declared_indexes
+
+SCHEMA = {
+    "name": "Country",
+    "id": "#Country",
+    "properties": {
+        "name": {"type": "string", "index": True},
+        "abbreviation": {"type": "string", "unique": True},
+        "continent": {"type": "string"},
+        "dialcode": {"type": "integer"},
+        "description": {"type": "string"},
+    },
+    "indexes": [
+        ["continent", ["dialcode", -1]],
+        {"keys": ["description"], "name": "by_description"},
+    ],
+}
+
+
+class TestIndexes(unittest.TestCase):
+    def testDeclaredIndexes(self):
+        """ Test that property flags and the indexes list are collected """
+
+        self.assertEqual(
+            [
+                ([("name", 1)], {}),
+                ([("abbreviation", 1)], {"unique": True}),
+                ([("continent", 1), ("dialcode", -1)], {}),
+                ([("description", 1)], {"name": "by_description"}),
+            ],
+            declared_indexes(SCHEMA),
+        )
+
+    def testEnsureIndexes(self):
+        """ Test that missing indexes are created, changed ones replaced """
+
+        schema = deepcopy(SCHEMA)
+        schema["indexes"].append(
+            {"keys": [["created", 1]], "expireAfterSeconds": 3600}
+        )
+
+        formal.connect("formal_test")
+        Country = formal.model_factory(schema)
+        Country.collection().drop_indexes()
+
+        created = Country.ensure_indexes()
+        self.assertEqual(
+            [
+                "name_1",
+                "abbreviation_1",
+                "continent_1_dialcode_-1",
+                "by_description",
+                "created_1",
+            ],
+            created,
+        )
+        self.assertEqual([], Country.ensure_indexes())
+
+        indexes = Country.collection().index_information()
+        self.assertTrue(indexes["abbreviation_1"]["unique"])
+        self.assertEqual(3600, indexes["created_1"]["expireAfterSeconds"])
+
+        schema["properties"]["name"]["unique"] = True
+        Country = formal.model_factory(schema, ensure_indexes=True)
+        indexes = Country.collection().index_information()
+        self.assertTrue(indexes["name_1"]["unique"])
+
+    def testEnsureIndexesSQL(self):
+        """ Test that SQL tables get the declared indexes """
+
+        engine = sqlalchemy.create_engine("sqlite://")
+        schema = deepcopy(SCHEMA)
+        schema.update({"name": "IndexedCountry", "id": "#IndexedCountry"})
+        schema["properties"]["abbreviation"]["primary"] = True
+        schema["indexes"].append({"keys": [["description", "text"]]})
+
+        formal.connect_sql(url="sqlite://")
+        Country = formal.model_factory(dict(schema, sql=True))
+
+        # The table was created without indexes
+        Country.table().create(engine)
+        for index in Country.table().indexes:
+            index.drop(engine)
+
+        self.assertEqual(
+            [
+                "by_description",
+                "ix_IndexedCountry_continent_dialcode",
+                "ix_IndexedCountry_name",
+            ],
+            Country.ensure_indexes(engine),
+        )
+        self.assertEqual([], Country.ensure_indexes(engine))
+
+        indexes = sqlalchemy.inspect(engine).get_indexes("IndexedCountry")
+        columns = {index["name"]: index["column_names"] for index in indexes}
+        self.assertEqual(
+            ["continent", "dialcode"], columns["ix_IndexedCountry_continent_dialcode"]
+        )
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Test partial objects loaded with a fields projection
+"""
+
+import unittest
+from copy import copy, deepcopy
+
+import formal
+from formal.exceptions import InvalidReloadException, NotLoadedError
+
+
+class TestPartial(unittest.TestCase):
+    def setUp(self):
+        """Set up the test scaffolding"""
+        self.schema = {
+            "name": "Country",
+            "id": "#Country",
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string"},
+                "languages": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["name", "abbreviation"],
+            "additionalProperties": False,
+        }
+
+        # Connect to formal_test - hopefully it doesn't exist
+        formal.connect("formal_test")
+        self.Country = formal.model_factory(self.schema)
+
+        # Drop all the data in it
+        self.Country.collection().delete_many({})
+
+        self.sweden = self.Country(
+            {"name": "Sweden", "abbreviation": "SE", "languages": ["swedish"]}
+        )
+        self.sweden.save()
+
+    def testPartial(self):
+        """ Test that only the projected fields are loaded """
+
+        sweden = next(self.Country.find({}, fields=["name"]))
+        self.assertEqual("Sweden", sweden.name)
+        self.assertEqual(self.sweden._id, sweden._id)
+        self.assertNotIn("languages", sweden.to_dict())
+
+        with self.assertRaises(NotLoadedError):
+            sweden.abbreviation
+        with self.assertRaises(NotLoadedError):
+            sweden.get("languages")
+        # Still an AttributeError, for getattr() and hasattr()
+        self.assertFalse(hasattr(sweden, "languages"))
+
+        sweden = self.Country.find_one({"name": "Sweden"}, fields=["abbreviation"])
+        self.assertEqual("SE", sweden.abbreviation)
+        with self.assertRaises(NotLoadedError):
+            sweden.name
+
+        sweden.reload()
+        self.assertEqual("Sweden", sweden.name)
+
+        # Part of a property could neither be validated nor saved
+        with self.assertRaises(ValueError):
+            self.Country.find_one({"name": "Sweden"}, fields=["capital.name"])
+        with self.assertRaises(ValueError):
+            list(self.Country.find({}, fields=["capital.name"]))
+
+    def testPartialSave(self):
+        """ Test that partial objects only write their changes """
+
+        sweden = self.Country.find_one({"name": "Sweden"}, fields=["name"])
+        sweden.name = "Sverige"
+        sweden.save()
+
+        stored = self.Country.find_by_id(self.sweden._id)
+        self.assertEqual("Sverige", stored.name)
+        self.assertEqual(["swedish"], stored.languages)
+
+        # Another document now, which would lose the fields not loaded
+        sweden._id = self.sweden._id
+        with self.assertRaises(ValueError):
+            sweden.save()
+
+        result = self.Country.bulk_save([sweden])
+        self.assertEqual(1, len(result.errors))
+
+    def testPartialSQL(self):
+        """ Test that SQL models only select the projected columns """
+
+        formal.connect_sql(url="sqlite://")
+        schema = {
+            "name": "PartialCountry",
+            "sql": True,
+            "id": "#PartialCountry",
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string", "primary": True},
+                "dialcode": {"type": "integer"},
+            },
+            "required": ["name", "dialcode"],
+        }
+        Country = formal.model_factory(schema)
+        Country({"name": "Sweden", "abbreviation": "SE", "dialcode": 46}).save()
+
+        sweden = next(Country.find({"dialcode": 46}, fields=["name"]))
+        self.assertEqual({"abbreviation": "SE", "name": "Sweden"}, sweden.to_dict())
+        with self.assertRaises(NotLoadedError):
+            sweden.dialcode
+
+        sweden.name = "Sverige"
+        sweden.save()
+        sweden = Country.find_one({"abbreviation": "SE"})
+        self.assertEqual(("Sverige", 46), (sweden.name, sweden.dialcode))
+
+        sweden = Country.find_by_id("SE", fields=["dialcode"])
+        self.assertEqual(46, sweden.dialcode)
+        sweden.abbreviation = "SV"
+        with self.assertRaises(ValueError):
+            sweden.save()
+
+        with self.assertRaises(ValueError):
+            list(Country.find(fields=["capital"]))
+
+    def testCopy(self):
+        """ Test that whole and partial objects can be copied """
+
+        partial = next(self.Country.find({}, fields=["name"]))
+
+        for obj in (self.sweden, partial):
+            for duplicate in (copy(obj), deepcopy(obj)):
+                self.assertIsNot(obj, duplicate)
+                self.assertEqual(obj.to_dict(), duplicate.to_dict())
+
+        duplicate = deepcopy(self.sweden)
+        duplicate.languages.append("finnish")
+        self.assertEqual(["swedish"], self.sweden.languages)
+
+        with self.assertRaises(NotLoadedError):
+            deepcopy(partial).abbreviation
+
+    def testCopySQL(self):
+        """ Test that SQL objects can be copied """
+
+        formal.connect_sql(url="sqlite://")
+        schema = {
+            "name": "CopiedCountry",
+            "sql": True,
+            "id": "#CopiedCountry",
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string", "primary": True},
+            },
+        }
+        Country = formal.model_factory(schema)
+        Country({"name": "Sweden", "abbreviation": "SE"}).save()
+
+        sweden = Country.find_by_id("SE")
+        partial = Country.find_one({"abbreviation": "SE"}, fields=["abbreviation"])
+
+        for obj in (sweden, partial):
+            for duplicate in (copy(obj), deepcopy(obj)):
+                self.assertEqual(obj.to_dict(), duplicate.to_dict())
+                self.assertFalse(duplicate.is_dirty)
+
+        with self.assertRaises(NotLoadedError):
+            copy(partial).name
+
+    def testResultModesSQL(self):
+        """ Test projections of the SQL dict and tuple results, and reloading
+        partial objects """
+
+        formal.connect_sql(url="sqlite://")
+        schema = {
+            "name": "ProjectedCountry",
+            "sql": True,
+            "id": "#ProjectedCountry",
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string", "primary": True},
+                "dialcode": {"type": "integer"},
+            },
+        }
+        Country = formal.model_factory(schema)
+        Country({"name": "Sweden", "abbreviation": "SE", "dialcode": 46}).save()
+
+        self.assertEqual(
+            [{"abbreviation": "SE", "dialcode": 46}],
+            list(Country.as_dicts(fields=["dialcode"])),
+        )
+        row = next(Country.as_tuples(fields=["dialcode"]))
+        self.assertEqual((None, "SE", 46), tuple(row))
+        self.assertEqual(46, row.dialcode)
+
+        sweden = Country.find_one({"abbreviation": "SE"}, fields=["name"])
+        with self.assertRaises(NotLoadedError):
+            sweden.dialcode
+
+        sweden.reload()
+        self.assertEqual(46, sweden.dialcode)
+        self.assertFalse(sweden.is_dirty)
+        sweden.abbreviation = "SV"
+        sweden.save()
+        self.assertEqual(2, Country.count())
+
+        Country.clear()
+        with self.assertRaises(InvalidReloadException):
+            sweden.reload()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Test that query operators give the same results on the SQL and the Mongo
+backend. Mongo is stood in for by mongomock.
+"""
+
+import unittest
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+import formal
+import formal.database
+from jsonschema.exceptions import ValidationError
+
+COUNTRIES = [
+    {"name": "Sweden", "abbreviation": "SE", "dialcode": 46, "continent": "Europe"},
+    {"name": "Norway", "abbreviation": "NO", "dialcode": 47, "continent": "Europe"},
+    {"name": "Canada", "abbreviation": "CA", "dialcode": 1, "continent": "America"},
+    {"name": "United States", "abbreviation": "US", "dialcode": 1},
+    {"name": "Japan", "abbreviation": "JP", "dialcode": 81, "continent": "Asia"},
+    {"name": "Nowhere", "abbreviation": "XX"},
+]
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class TestQuerying(unittest.TestCase):
+    def setUp(self):
+        """Set up the same data on both backends"""
+        properties = {
+            "name": {"type": "string"},
+            "abbreviation": {"type": "string", "primary": True},
+            "dialcode": {"type": "integer"},
+            "continent": {"type": "string"},
+        }
+
+        formal.database.databases["formal_query_test"] = mongomock.MongoClient()[
+            "formal_query_test"
+        ]
+        self.MongoCountry = formal.model_factory(
+            {
+                "name": "Country",
+                "id": "#Country",
+                "databaseName": "formal_query_test",
+                "properties": properties,
+            }
+        )
+
+        formal.connect_sql(":memory:", "sqlite", "", "", "", 0)
+        self.SQLCountry = formal.model_factory(
+            {
+                "name": "QueryCountry",
+                "sql": True,
+                "id": "#QueryCountry",
+                "properties": properties,
+            }
+        )
+
+        for country in COUNTRIES:
+            self.MongoCountry(country).save()
+            self.SQLCountry(country).save()
+
+    def tearDown(self):
+        del formal.database.databases["formal_query_test"]
+
+    def assertSameResults(self, query, expected):
+        """ Both backends find the `expected` countries for `query` """
+
+        mongo = {country.abbreviation for country in self.MongoCountry.find(query)}
+        found = {country.abbreviation for country in self.SQLCountry.find(query)}
+
+        self.assertEqual(set(expected), mongo)
+        self.assertEqual(set(expected), found)
+
+    def testComparisons(self):
+        """ Test $gt, $gte, $lt and $lte """
+
+        self.assertSameResults({"dialcode": {"$gt": 46}}, ["NO", "JP"])
+        self.assertSameResults({"dialcode": {"$gte": 46}}, ["SE", "NO", "JP"])
+        self.assertSameResults({"dialcode": {"$lt": 46}}, ["CA", "US"])
+        self.assertSameResults({"dialcode": {"$gte": 2, "$lte": 47}}, ["SE", "NO"])
+
+    def testNotEqual(self):
+        """ Test that $ne also matches missing values """
+
+        self.assertSameResults({"dialcode": {"$ne": 1}}, ["SE", "NO", "JP", "XX"])
+        self.assertSameResults({"continent": {"$ne": None}}, ["SE", "NO", "CA", "JP"])
+        self.assertSameResults({"continent": None}, ["US", "XX"])
+
+    def testIn(self):
+        """ Test $in and $nin """
+
+        self.assertSameResults(
+            {"abbreviation": {"$in": ["SE", "JP", "DE"]}}, ["SE", "JP"]
+        )
+        self.assertSameResults(
+            {"continent": {"$in": ["Asia", None]}}, ["JP", "US", "XX"]
+        )
+        self.assertSameResults({"dialcode": {"$nin": [1, 46]}}, ["NO", "JP", "XX"])
+        self.assertSameResults({"continent": {"$nin": ["Europe", None]}}, ["CA", "JP"])
+
+    def testExists(self):
+        """ Test $exists """
+
+        self.assertSameResults({"dialcode": {"$exists": False}}, ["XX"])
+        self.assertSameResults({"continent": {"$exists": True}, "dialcode": 1}, ["CA"])
+
+    def testLogical(self):
+        """ Test $and and $or, also nested """
+
+        self.assertSameResults(
+            {"$or": [{"dialcode": 1}, {"continent": "Asia"}]}, ["CA", "US", "JP"]
+        )
+        self.assertSameResults(
+            {
+                "$and": [
+                    {"continent": "Europe"},
+                    {"$or": [{"abbreviation": "NO"}, {"dialcode": {"$lt": 10}}]},
+                ]
+            },
+            ["NO"],
+        )
+
+    def testRegex(self):
+        """ Test $regex with and without options """
+
+        self.assertSameResults({"name": {"$regex": "^No"}}, ["NO", "XX"])
+        self.assertSameResults(
+            {"name": {"$regex": "^no", "$options": "i"}}, ["NO", "XX"]
+        )
+        self.assertSameResults({"name": {"$regex": "an"}}, ["CA", "JP"])
+
+    def testUpdateMany(self):
+        """ Test changing many documents at once """
+
+        for model in (self.MongoCountry, self.SQLCountry):
+            result = model.update_many({"dialcode": 1}, {"continent": "America"})
+            self.assertEqual(2, result.matched_count)
+
+            changes = {"$unset": ["continent"], "$set": {"dialcode": 82}}
+            result = model.update_many({"continent": "Asia"}, changes)
+            self.assertEqual(1, result.matched_count)
+            self.assertEqual(1, result.modified_count)
+
+            with self.assertRaises(ValidationError):
+                model.update_many({}, {"dialcode": "one"})
+            with self.assertRaises(ValidationError):
+                model.update_many({}, {"$set": {"name": 1}})
+
+        self.assertSameResults({"continent": "America"}, ["CA", "US"])
+        self.assertSameResults({"continent": None}, ["JP", "XX"])
+        self.assertSameResults({"dialcode": 82}, ["JP"])
+
+    def testDeleteMany(self):
+        """ Test removing many documents at once """
+
+        for model in (self.MongoCountry, self.SQLCountry):
+            result = model.delete_many({"dialcode": {"$lt": 47}})
+            self.assertEqual(3, result.deleted_count)
+
+        self.assertSameResults({}, ["NO", "JP", "XX"])
+
+    def testUnsupported(self):
+        """ Test that unknown operators are refused """
+
+        with self.assertRaises(ValueError):
+            list(self.SQLCountry.find({"dialcode": {"$near": 1}}))
+
+        with self.assertRaises(ValueError):
+            list(self.SQLCountry.find({"$nor": [{"dialcode": 1}]}))
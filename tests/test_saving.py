@@ -47,6 +47,7 @@ class TestCreating(unittest.TestCase):
                 "name": {"type": "string"},
                 "abbreviation": {"type": "string"},
                 "languages": {"type": ["array", "null"], "items": {"type": "string"}},
+                "facts": {"type": "object"},
             },
             "additionalProperties": False,
         }
@@ -118,3 +119,187 @@ class TestCreating(unittest.TestCase):
         self.assertEqual("SE", sverige.abbreviation)
         self.assertEqual(1, len(sverige.languages))
         self.assertTrue("swedish" in sverige.languages)
+
+    def testPartialSave(self):
+        """Test if only changed fields are written back"""
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+
+        self.assertFalse(sweden.is_dirty)
+        self.assertEqual(set(), sweden.changed_fields())
+
+        sweden.name = "Sverige"
+
+        self.assertTrue(sweden.is_dirty)
+        self.assertEqual({"name"}, sweden.changed_fields())
+
+        # Somebody else changes another field in the meantime
+        self.Country.collection().update_one(
+            {"_id": sweden._fields["_id"]}, {"$set": {"abbreviation": "SV"}}
+        )
+
+        sweden.save()
+
+        self.assertFalse(sweden.is_dirty)
+
+        sverige = self.Country.find_one({"name": "Sverige"})
+
+        self.assertEqual("SV", sverige.abbreviation)
+
+    def testUnsetField(self):
+        """Test if removed fields are removed from the database"""
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+
+        del sweden.languages
+
+        self.assertEqual({"languages"}, sweden.changed_fields())
+
+        sweden.save()
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+
+        self.assertIsNone(sweden.get("languages"))
+
+    def testInPlaceChange(self):
+        """Test if lists and dicts changed in place are written back"""
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        self.assertFalse(sweden.is_dirty)
+
+        sweden.languages.append("finnish")
+        self.assertEqual({"languages"}, sweden.changed_fields())
+        sweden.save()
+        self.assertFalse(sweden.is_dirty)
+
+        sweden.facts = {"capital": {"name": "Stockholm"}}
+        sweden.save()
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        self.assertEqual(["swedish", "finnish"], sweden.languages)
+
+        sweden.get("facts")["capital"]["population"] = 975551
+        sweden.save()
+
+        # Changes the object can't see have to be marked
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        sweden._fields["languages"].append("sami")
+        self.assertFalse(sweden.is_dirty)
+        sweden.mark_dirty("languages")
+        sweden.save()
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        self.assertEqual(975551, sweden.facts["capital"]["population"])
+        self.assertEqual(["swedish", "finnish", "sami"], sweden.languages)
+
+    def testInPlaceChangeAfterSave(self):
+        """Test if lists and dicts read before a save stay watched"""
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        languages = sweden.languages
+        sweden.name = "Sverige"
+        sweden.save()
+
+        languages.append("finnish")
+        self.assertTrue(sweden.is_dirty)
+        sweden.save()
+
+        languages.append("sami")
+        sweden.save()
+
+        # The same for new objects
+        norway = self.Country({"name": "Norway", "abbreviation": "NO"})
+        norway.languages = ["norwegian"]
+        languages = norway.languages
+        norway.save()
+
+        languages.append("sami")
+        self.assertEqual({"languages"}, norway.changed_fields())
+        norway.save()
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        self.assertEqual("Sverige", sweden.name)
+        self.assertEqual(["swedish", "finnish", "sami"], sweden.languages)
+        norway = self.Country.find_one({"abbreviation": "NO"})
+        self.assertEqual(["norwegian", "sami"], norway.languages)
+
+    def testNewObjectIsDirty(self):
+        """Test if unsaved objects write everything"""
+
+        norway = self.Country({"name": "Norway", "abbreviation": "NO"})
+
+        self.assertTrue(norway.is_dirty)
+        self.assertEqual({"name", "abbreviation"}, norway.changed_fields())
+
+        norway.save()
+
+        self.assertFalse(norway.is_dirty)
+        self.assertEqual(2, self.Country.count())
+
+    def testBulkCreate(self):
+        """Test creating many objects at once"""
+
+        countries = [
+            self.Country({"name": "Norway", "abbreviation": "NO"}),
+            self.Country({"name": "Denmark", "abbreviation": "DK"}),
+            self.Country({"name": "Finland", "abbreviation": "FI"}),
+        ]
+        # Broken after construction
+        countries[2]._fields["name"] = 5
+
+        result = self.Country.bulk_create(countries, chunk_size=1)
+
+        self.assertEqual(2, result.inserted_count)
+        self.assertEqual(1, len(result.errors))
+        self.assertIs(countries[2], result.errors[0][0])
+
+        self.assertEqual(3, self.Country.count())
+        self.assertFalse(countries[0].is_dirty)
+        norway = self.Country.find_by_id(countries[0]._fields["_id"])
+        self.assertEqual("Norway", norway.name)
+        self.assertNotIn("_id", countries[2]._fields)
+
+    def testBulkSave(self):
+        """Test saving new, changed and unchanged objects at once"""
+
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        sweden.name = "Sverige"
+        norway = self.Country({"name": "Norway", "abbreviation": "NO"})
+        unchanged = self.Country.find_one({"abbreviation": "SE"})
+
+        result = self.Country.bulk_save([sweden, norway, unchanged])
+
+        self.assertEqual(1, result.inserted_count)
+        self.assertEqual(1, result.modified_count)
+        self.assertEqual([], result.errors)
+        self.assertFalse(sweden.is_dirty)
+        self.assertIn("_id", norway._fields)
+
+        self.assertEqual(2, self.Country.count())
+        self.assertEqual(1, self.Country.count({"name": "Sverige"}))
+
+    def testBulkUpsert(self):
+        """Test replacing or inserting objects by key"""
+
+        countries = [
+            self.Country({"name": "Sverige", "abbreviation": "SE"}),
+            self.Country({"name": "Norway", "abbreviation": "NO"}),
+        ]
+
+        result = self.Country.bulk_upsert(countries, keys=["abbreviation"])
+
+        self.assertEqual(1, result.matched_count)
+        self.assertEqual(1, result.upserted_count)
+        self.assertEqual(2, self.Country.count())
+        self.assertEqual("Sverige", self.Country.find_one({"abbreviation": "SE"}).name)
+
+        # Both know their documents now, saving them again updates them
+        sweden = self.Country.find_one({"abbreviation": "SE"})
+        self.assertEqual(sweden._id, countries[0]._id)
+        self.assertFalse(any(country.is_dirty for country in countries))
+
+        countries[0].name = "Sweden"
+        countries[0].save()
+        countries[1].save()
+        self.assertEqual(2, self.Country.count())
+        self.assertEqual("Sweden", self.Country.find_one({"abbreviation": "SE"}).name)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+
+# Formal
+# ======
+#
+# Copyright 2015-2019 Heiko 'riot' Weinen <riot@c-base.org> and others.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Test the identity map and unit of work of sessions
+"""
+
+import unittest
+
+import sqlalchemy
+
+import formal
+from formal.exceptions import FlushError
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self):
+        """Set up the test scaffolding"""
+        self.schema = {
+            "name": "Country",
+            "id": "#Country",
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string"},
+            },
+            "additionalProperties": False,
+        }
+
+        # Connect to formal_test - hopefully it doesn't exist
+        formal.connect("formal_test")
+        self.Country = formal.model_factory(self.schema)
+
+        # Drop all the data in it
+        self.Country.collection().delete_many({})
+
+        self.sweden = self.Country({"name": "Sweden", "abbreviation": "SE"})
+        self.sweden.save()
+        self.Country({"name": "Norway", "abbreviation": "NO"}).save()
+
+    def testIdentityMap(self):
+        """ Test that objects are only loaded once """
+
+        with formal.Session():
+            sweden = self.Country.find_by_id(self.sweden._id)
+
+            self.assertIs(sweden, self.Country.find_by_id(str(self.sweden._id)))
+            self.assertIs(sweden, self.Country.find_one({"abbreviation": "SE"}))
+            self.assertIn(sweden, list(self.Country.find()))
+
+        self.assertIsNot(sweden, self.Country.find_by_id(self.sweden._id))
+
+    def testUnitOfWork(self):
+        """ Test that changes are written when the session ends """
+
+        with formal.Session() as session:
+            sweden = self.Country.find_one({"abbreviation": "SE"})
+            sweden.name = "Sverige"
+            sweden.save()
+
+            denmark = self.Country({"name": "Denmark", "abbreviation": "DK"})
+            denmark.save()
+
+            self.Country.find_one({"abbreviation": "NO"}).delete()
+
+            # Nothing written yet
+            self.assertEqual(2, self.Country.count())
+            self.assertEqual([denmark], session.new)
+
+        self.assertEqual(2, self.Country.count())
+        self.assertEqual("Sverige", self.Country.find_by_id(sweden._id).name)
+        self.assertIsNotNone(denmark._id)
+        self.assertFalse(denmark.is_dirty)
+        self.assertIsNone(self.Country.find_one({"abbreviation": "NO"}))
+
+    def testNothingWrittenOnError(self):
+        """ Test that a failing block discards the changes """
+
+        with self.assertRaises(KeyError):
+            with formal.Session():
+                self.Country({"name": "Denmark", "abbreviation": "DK"}).save()
+                raise KeyError()
+
+        self.assertEqual(2, self.Country.count())
+
+
+class TestSessionSQL(unittest.TestCase):
+    def setUp(self):
+        """Set up the test scaffolding"""
+        self.schema = {
+            "name": "SessionCountry",
+            "sql": True,
+            "id": "#SessionCountry",
+            "properties": {
+                "name": {"type": "string"},
+                "abbreviation": {"type": "string", "primary": True},
+            },
+        }
+
+        formal.connect_sql(url="sqlite://")
+        self.Country = formal.model_factory(self.schema)
+
+        self.Country({"name": "Sweden", "abbreviation": "SE"}).save()
+        self.Country({"name": "Norway", "abbreviation": "NO"}).save()
+
+    def testUnitOfWorkSQL(self):
+        """ Test that a session writes in a single transaction """
+
+        transactions = []
+
+        def record(connection):
+            transactions.append(connection)
+
+        engine = self.Country.engine()
+        sqlalchemy.event.listen(engine, "begin", record)
+
+        try:
+            with formal.Session():
+                sweden = self.Country.find_by_id("SE")
+                self.assertIs(sweden, self.Country.find_one({"name": "Sweden"}))
+                sweden.name = "Sverige"
+
+                self.Country({"name": "Denmark", "abbreviation": "DK"}).save()
+                self.Country.find_by_id("NO").delete()
+
+                self.assertEqual(2, self.Country.count())
+                del transactions[:]
+        finally:
+            sqlalchemy.event.remove(engine, "begin", record)
+
+        self.assertEqual(1, len(transactions))
+        self.assertEqual({"SE", "DK"}, set(self.Country.as_columns()["abbreviation"]))
+        self.assertEqual("Sverige", self.Country.find_by_id("SE").name)
+
+    def testRollbackSQL(self):
+        """ Test that objects are unchanged when the flush is rolled back """
+
+        schema = {
+            "name": "SessionTown",
+            "sql": True,
+            "id": "#SessionTown",
+            "properties": {
+                "townid": {"type": "integer", "primary": True},
+                "name": {"type": "string", "unique": True},
+            },
+        }
+        Town = formal.model_factory(schema)
+        Town({"name": "Malmö"}).save()
+        lund = Town({"name": "Lund"})
+        key = lund.save()
+
+        with self.assertRaises(FlushError) as context:
+            with formal.Session():
+                ystad = Town({"name": "Ystad"})
+                ystad.save()
+                # Written after ystad, violates the unique index
+                lund.name = "Malmö"
+                lund.save()
+
+        result = context.exception.result
+        errors = {obj.get("name"): error for obj, error in result.errors}
+        self.assertEqual({"Ystad", "Malmö"}, set(errors))
+        self.assertIn("UNIQUE", errors["Malmö"]["errmsg"])
+
+        self.assertIsNone(ystad.get("townid"))
+        self.assertTrue(ystad.is_dirty)
+        self.assertEqual({"name"}, lund.changed_fields())
+        self.assertEqual(["Lund", "Malmö"], sorted(Town.as_columns()["name"]))
+
+        lund.name = "Lund"
+        self.assertEqual(key, lund.save())
+        ystad.save()
+        self.assertEqual(3, Town.count())
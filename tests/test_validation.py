@@ -33,9 +33,12 @@ been added in accordance to the Apache License 2.0
 """
 
 import unittest
+from datetime import datetime
+
 from bson import ObjectId
 
 import formal
+from formal.exceptions import InvalidSchemaException
 
 # from formal.exceptions import ValidationError
 from jsonschema.exceptions import ValidationError
@@ -171,3 +174,133 @@ class TestValidation(unittest.TestCase):
 
         self.assertEqual(False, m.field)
         self.assertRaises(ValidationError, model, {"field": "hi"})
+
+    def testValidatorIsCompiledOnce(self):
+        schema = {
+            "name": "Model",
+            "id": "#Model",
+            "properties": {"field": {"type": "string"}},
+        }
+
+        model = formal.model_factory(schema)
+
+        first = model({"field": "asdf"})
+        second = model({"field": "hello"})
+
+        self.assertIsNotNone(model._validator)
+        self.assertIs(first._validator, second._validator)
+        self.assertIs(first._default_validator, second._default_validator)
+
+    def testFormalTypes(self):
+        schema = {
+            "name": "Reference",
+            "id": "#Reference",
+            "properties": {
+                "target": {"type": "object_id"},
+                "created": {"type": "date"},
+                "updated": {"type": ["date", "string", "null"]},
+            },
+        }
+
+        model = formal.model_factory(schema)
+        model.collection().delete_many({})
+
+        target = ObjectId()
+        created = datetime(2019, 5, 1, 12, 30)
+        m = model({"target": target, "created": created, "updated": None})
+        m.save()
+
+        self.assertRaises(ValidationError, model, {"target": "hi"})
+        self.assertRaises(ValidationError, model, {"created": "yesterday"})
+
+        found = model.find_one({"created": created})
+        self.assertEqual(str(target), found.target)
+        self.assertEqual(created, found.created)
+        self.assertEqual(1, len(list(model.find({}, validation=False))))
+
+    def testInvalidSchema(self):
+        schema = {
+            "name": "Model",
+            "id": "#Model",
+            "properties": {"field": {"type": "no_such_type"}},
+        }
+
+        self.assertRaises(InvalidSchemaException, formal.model_factory, schema)
+
+    def testValidateAssignment(self):
+        schema = {
+            "name": "Model",
+            "id": "#Model",
+            "definitions": {"state": {"type": "string", "enum": ["open", "done"]}},
+            "properties": {
+                "status": {"$ref": "#/definitions/state"},
+                "items": {"type": "array", "items": {"type": "integer"}},
+            },
+            "required": ["status"],
+        }
+
+        model = formal.model_factory(schema)
+
+        m = model({"status": "open", "items": [1, 2, 3]})
+        m.status = "done"
+
+        self.assertEqual("done", m.status)
+        self.assertRaises(ValidationError, setattr, m, "status", "closed")
+        self.assertRaises(ValidationError, setattr, m, "items", [1, "two"])
+        self.assertEqual("done", m.status)
+        self.assertEqual([1, 2, 3], m.items)
+
+        broken = model({"items": []}, validation=False)
+        self.assertRaises(ValidationError, setattr, broken, "items", [1])
+
+    def testValidateAssignmentWholeDocument(self):
+        schema = {
+            "name": "Model",
+            "id": "#Model",
+            "properties": {
+                "low": {"type": "integer"},
+                "high": {"type": "integer"},
+            },
+            "maxProperties": 1,
+        }
+
+        model = formal.model_factory(schema)
+
+        m = model({"low": 1})
+
+        self.assertRaises(ValidationError, setattr, m, "high", 5)
+        m.low = 2
+        self.assertEqual(2, m.low)
+
+    def testSlottedProperties(self):
+        schema = {
+            "name": "Model",
+            "id": "#Model",
+            "properties": {
+                "field": {"type": "string"},
+                "update": {"type": "string"},
+            },
+        }
+
+        model = formal.model_factory(schema)
+
+        m = model({"field": "asdf", "update": "never"})
+
+        self.assertEqual("asdf", m.field)
+        self.assertEqual({"field": "asdf", "update": "never"}, m.to_dict())
+
+        # Properties never shadow the model's API
+        m.update({"field": "hello"})
+        self.assertEqual("hello", m.field)
+        self.assertEqual("never", m.get("update"))
+
+        self.assertRaises(ValidationError, setattr, m, "field", 5)
+
+        # Private attributes are set freely, apart from the fields
+        m._note = "mine"
+        self.assertEqual("mine", m._note)
+        self.assertEqual({"_note": "mine"}, m.__dict__)
+        self.assertNotIn("_note", m.to_dict())
+
+        del m.field
+        self.assertRaises(AttributeError, getattr, m, "field")